@@ -0,0 +1,180 @@
+"""
+AI Latency and Memory Benchmark
+Trains SelfLearningAI on a synthetic bilingual corpus at several sizes and
+measures learn throughput, generate latency, save/load time and memory
+
+Usage:
+    python -m benchmarks.ai_bench --sizes 10000,100000 --output results.json
+    python -m benchmarks.ai_bench --sizes 10000 --baseline results.json
+
+Each size runs in a fresh process so resident memory is not shared
+between runs. Exits with status 1 when a metric regresses past
+--tolerance compared with the baseline.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import iter_pairs
+
+# Metric -> True if higher is better
+METRICS = {
+    'learn_pairs_per_s': True,
+    'generate_p50_ms': False,
+    'generate_p99_ms': False,
+    'save_s': False,
+    'load_s': False,
+    'rss_mb': False,
+}
+
+def rss_mb() -> float:
+    """Current resident set size (peak on platforms without /proc)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+def percentile(sorted_values, fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def run_size(size: int, queries: int, seed: int, config: dict) -> dict:
+    """Benchmark one corpus size (runs in a child process)"""
+    from modules.ai_system import SelfLearningAI
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {**config, 'group_shard_dir': os.path.join(tmp, 'groups')}
+        knowledge_file = os.path.join(tmp, 'knowledge.pkl')
+        ai = SelfLearningAI(knowledge_file, config)
+        baseline_rss = rss_mb()
+
+        # Learn through the live path, one pair at a time
+        inputs = []
+        started = time.perf_counter()
+        for input_text, response, user_id, group_id, _ in iter_pairs(size, seed):
+            ai.learn(input_text, response, user_id, group_id)
+            if len(inputs) < queries:
+                inputs.append((input_text, user_id, group_id))
+        learn_s = time.perf_counter() - started
+        trained_rss = rss_mb()
+
+        # Half learned inputs, half unseen messages, from a cold cache
+        rng = random.Random(seed)
+        unseen = [(text, user_id, group_id) for text, _, user_id, group_id, _ in iter_pairs(queries, seed + 1)]
+        workload = rng.sample(inputs, min(len(inputs), queries // 2)) + unseen[:queries - queries // 2]
+        rng.shuffle(workload)
+        ai.response_cache.clear()
+
+        latencies = []
+        for text, user_id, group_id in workload:
+            call_started = time.perf_counter()
+            ai.generate_response(text, user_id, group_id)
+            latencies.append((time.perf_counter() - call_started) * 1000)
+        latencies.sort()
+
+        started = time.perf_counter()
+        ai.save_knowledge()
+        save_s = time.perf_counter() - started
+        file_mb = os.path.getsize(knowledge_file) / 2**20
+        stats = dict(ai.get_stats())
+        cache_stats = ai.get_cache_stats()
+
+        del ai
+        started = time.perf_counter()
+        SelfLearningAI(knowledge_file, config)  # group shards load lazily
+        load_s = time.perf_counter() - started
+
+    return {
+        'pairs': size,
+        'learn_s': round(learn_s, 3),
+        'learn_pairs_per_s': round(size / learn_s, 1),
+        'generate_p50_ms': round(percentile(latencies, 0.50), 4),
+        'generate_p99_ms': round(percentile(latencies, 0.99), 4),
+        'generate_max_ms': round(latencies[-1], 4),
+        'cache_hit_rate': cache_stats.get('hit_rate'),
+        'save_s': round(save_s, 3),
+        'load_s': round(load_s, 3),
+        'knowledge_file_mb': round(file_mb, 2),
+        'rss_mb': round(trained_rss, 1),
+        'rss_growth_mb': round(trained_rss - baseline_rss, 1),
+        'patterns_stored': stats.get('patterns_stored'),
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """List regressions of more than `tolerance` (a fraction) against a baseline"""
+    regressions = []
+    for size, result in results['results'].items():
+        previous = baseline.get('results', {}).get(size)
+        if not previous:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            if worse > tolerance:
+                regressions.append(f"{size} pairs: {metric} {old} -> {new} ({change:+.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the self-learning AI")
+    parser.add_argument('--sizes', default="10000,100000,1000000", help="Comma-separated corpus sizes")
+    parser.add_argument('--queries', type=int, default=2000, help="generate_response calls per size")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write results JSON here")
+    parser.add_argument('--baseline', help="Compare with a previous results JSON")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    from config import Config
+
+    results = {
+        'meta': {
+            'created_at': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'queries': args.queries,
+        },
+        'results': {},
+    }
+
+    context = multiprocessing.get_context('spawn')
+    for size in (int(s) for s in args.sizes.split(',')):
+        with context.Pool(1) as pool:
+            result = pool.apply(run_size, (size, args.queries, args.seed, Config.AI_CONFIG))
+        results['results'][str(size)] = result
+        print(
+            f"{size:>9} pairs: learn {result['learn_pairs_per_s']:.0f}/s, "
+            f"generate p50 {result['generate_p50_ms']}ms p99 {result['generate_p99_ms']}ms, "
+            f"save {result['save_s']}s, load {result['load_s']}s, rss {result['rss_mb']}MB"
+        )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Synthetic Chat Corpus
+Reproducible Bengali/English (input, response) pairs for benchmarks
+"""
+
+import itertools
+import random
+import time
+from typing import Iterator, List, Tuple
+
+EN_WORDS = [
+    "hi", "hello", "bro", "bhai", "what", "where", "when", "how", "why", "who", "is", "are", "the",
+    "you", "me", "we", "they", "this", "that", "good", "night", "morning", "thanks", "bye", "ok",
+    "yes", "no", "game", "play", "match", "today", "tomorrow", "class", "exam", "result", "group",
+    "admin", "link", "video", "song", "movie", "food", "tea", "coffee", "rain", "weather", "cricket",
+    "football", "win", "lose", "funny", "nice", "great", "bad", "love", "friend", "help", "please",
+    "doing", "going", "coming", "ki", "koro", "kemon", "acho", "valo", "ache", "khabar", "kothay",
+]
+
+BN_WORDS = [
+    "কি", "খবর", "সবার", "কেমন", "আছেন", "ভালো", "আছি", "ধন্যবাদ", "আজকে", "আবহাওয়া", "খেলা",
+    "কোথায়", "যাচ্ছো", "কখন", "আসবে", "বন্ধু", "ভাই", "আপু", "গান", "শুনছি", "পরীক্ষা", "ফলাফল",
+    "খাবার", "চা", "বৃষ্টি", "হচ্ছে", "সকাল", "রাত", "শুভ", "হাই", "হ্যালো", "বিদায়", "খোদা",
+    "হাফেজ", "মজা", "দারুণ", "সুন্দর", "কেন", "এটা", "ওটা", "আমি", "তুমি", "আমরা", "গ্রুপ",
+]
+
+def _cumulative_zipf(size: int, exponent: float = 1.1) -> List[float]:
+    """Cumulative Zipf weights, so a few words are common and most are rare"""
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, size + 1)))
+
+def iter_pairs(count: int, seed: int = 42, users: int = 500, groups: int = 50,
+               span: float = 7 * 86400, end: float = None) -> Iterator[Tuple]:
+    """Yield (input, response, user_id, group_id, timestamp) tuples
+
+    Messages mix Bengali, English and Banglish words drawn from Zipf
+    distributions; timestamps are evenly spread over `span` seconds
+    ending at `end` (default: now). The same seed always yields the
+    same corpus.
+    """
+    rng = random.Random(seed)
+    end = time.time() if end is None else end
+    vocabularies = [
+        (EN_WORDS, _cumulative_zipf(len(EN_WORDS))),
+        (BN_WORDS, _cumulative_zipf(len(BN_WORDS))),
+    ]
+
+    def message() -> str:
+        vocabulary, weights = vocabularies[rng.random() < 0.6]
+        words = rng.choices(vocabulary, cum_weights=weights, k=rng.randint(1, 8))
+        text = ' '.join(words)
+        return f"{text}?" if rng.random() < 0.15 else text
+
+    step = span / max(count, 1)
+    for index in range(count):
+        group_id = -1000000000 - rng.randrange(groups) if rng.random() < 0.8 else None
+        yield message(), message(), rng.randint(1, users), group_id, end - span + index * step
+
+def generate_pairs(count: int, seed: int = 42, **kwargs) -> List[Tuple]:
+    """Materialized iter_pairs()"""
+    return list(iter_pairs(count, seed, **kwargs))
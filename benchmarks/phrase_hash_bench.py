@@ -0,0 +1,83 @@
+"""
+Phrase Hashing Benchmark
+Compares string phrase keys with hashed phrase buckets on a replayed corpus
+
+Usage: python -m benchmarks.phrase_hash_bench [--pairs 50000] [--buckets 0,262144,65536,16384]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks.corpus import generate_pairs
+from modules.ai_system import SelfLearningAI
+from modules.ai_trainer import tokenize_pairs
+from utils.helpers import deep_sizeof
+
+def sample_queries(pairs, count: int, seed: int):
+    """Learned inputs, or a 2-3 word phrase of them, as exact-match queries"""
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        chunks = rng.choice(pairs)[0].lower().split()
+        if len(chunks) < 2:
+            continue
+        size = rng.randint(2, min(3, len(chunks)))
+        start = rng.randrange(len(chunks) - size + 1)
+        queries.append(' '.join(chunks[start:start + size]))
+    return queries
+
+def replay(pairs, queries, buckets: int) -> dict:
+    """Learn the corpus with the given bucket count and measure memory and recall"""
+    with tempfile.TemporaryDirectory() as tmp:
+        ai = SelfLearningAI(f"{tmp}/knowledge.pkl", {
+            'phrase_hash_buckets': buckets,
+            'group_shard_dir': f"{tmp}/groups",
+        })
+
+        started = time.perf_counter()
+        ai.learn_bulk(tokenize_pairs(pairs, ai.tokenizer))
+        learn_seconds = time.perf_counter() - started
+
+        patterns = ai.knowledge['patterns']
+        phrase_keys = sum(1 for key in patterns if isinstance(key, int) or ' ' in key)
+        answers = [ai._lookup_response(query) for query in queries]
+        return {
+            'keys': len(patterns),
+            'phrase_keys': phrase_keys,
+            'bytes': deep_sizeof(patterns) + deep_sizeof(ai.knowledge['age_index']),
+            'hits': sum(1 for query in queries if ai._exact_patterns(query)),
+            'answers': answers,
+            'learn_seconds': learn_seconds,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hashed phrase keys")
+    parser.add_argument('--pairs', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--buckets', default="0,262144,65536,16384",
+                        help="Comma-separated bucket counts (0 = string keys)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    pairs = generate_pairs(args.pairs, args.seed)
+    queries = sample_queries(pairs, args.queries, args.seed)
+    results = [(int(b), replay(pairs, queries, int(b))) for b in args.buckets.split(',')]
+    baseline = results[0][1]
+
+    print(f"pairs: {len(pairs)}  queries: {len(queries)}")
+    print(f"{'buckets':>10} {'keys':>9} {'phrase keys':>12} {'memory MB':>10} "
+          f"{'exact hits':>11} {'agreement':>10} {'learn s':>8}")
+    for buckets, result in results:
+        agreement = sum(
+            1 for a, b in zip(result['answers'], baseline['answers']) if a == b
+        ) / len(queries)
+        print(
+            f"{buckets or 'strings':>10} {result['keys']:>9} {result['phrase_keys']:>12} "
+            f"{result['bytes'] / 1e6:>10.1f} {result['hits'] / len(queries):>11.1%} "
+            f"{agreement:>10.1%} {result['learn_seconds']:>8.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
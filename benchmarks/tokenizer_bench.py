@@ -0,0 +1,94 @@
+"""
+Tokenizer Benchmark
+Compares the compiled single-pass tokenizer with the previous per-message cost
+
+Usage: python -m benchmarks.tokenizer_bench [--messages 20000]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from modules.ai_tokenizer import Tokenizer
+
+SAMPLE_MESSAGES = [
+    "hi", "ki koro", "good night", "this is the best group ever",
+    "what are you doing today?", "thanks bhai", "কি খবর সবার", "আজকে আবহাওয়া কেমন",
+    "খোদা হাফেজ সবাই", "হাই কেমন আছেন", "ধন্যবাদ আপনাকে অনেক", "where is the meeting tomorrow",
+    "lol 😂 that was funny", "check this out: https://example.com/page", "bye everyone see you",
+]
+
+# ==================== PREVIOUS IMPLEMENTATION ====================
+
+def legacy_extract_words(text):
+    words = re.findall(r'[\u0980-\u09FF]+|[a-zA-Z]+', text.lower())
+    return [w for w in words if len(w) > 1]
+
+def legacy_extract_phrases(text):
+    words = text.split()
+    phrases = []
+    for i in range(len(words) - 1):
+        phrase2 = ' '.join(words[i:i+2])
+        if len(phrase2) > 3:
+            phrases.append(phrase2)
+        if i < len(words) - 2:
+            phrase3 = ' '.join(words[i:i+3])
+            if len(phrase3) > 5:
+                phrases.append(phrase3)
+    return phrases
+
+def legacy_detect_intent(text):
+    text_lower = text.lower()
+    question_words = ['what', 'where', 'when', 'why', 'how', 'who', 'which', 'কি', 'কোন', 'কখন', 'কোথায়', 'কেন', 'কীভাবে']
+    if any(word in text_lower for word in question_words) or text_lower.endswith('?'):
+        return 'question'
+    greeting_words = ['hello', 'hi', 'hey', 'hola', 'নমস্কার', 'সালাম', 'হ্যালো', 'হাই']
+    if any(word in text_lower for word in greeting_words):
+        return 'greeting'
+    thanks_words = ['thanks', 'thank', 'ধন্যবাদ', 'শুকরিয়া']
+    if any(word in text_lower for word in thanks_words):
+        return 'thanks'
+    farewell_words = ['bye', 'goodbye', 'বিদায়', 'খোদা হাফেজ']
+    if any(word in text_lower for word in farewell_words):
+        return 'farewell'
+    return 'general'
+
+def legacy_tokenize(text):
+    return legacy_extract_words(text), legacy_extract_phrases(text), legacy_detect_intent(text)
+
+# ==================== BENCHMARK ====================
+
+def time_per_message(func, messages) -> float:
+    """Average microseconds per call over all messages"""
+    started = time.perf_counter()
+    for message in messages:
+        func(message)
+    return (time.perf_counter() - started) / len(messages) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AI tokenizer")
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    messages = [rng.choice(SAMPLE_MESSAGES) for _ in range(args.messages)]
+    tokenizer = Tokenizer()
+
+    legacy_us = time_per_message(legacy_tokenize, messages)
+    compiled_us = time_per_message(tokenizer.tokenize, messages)
+
+    intent_changes = sum(
+        1 for message in SAMPLE_MESSAGES
+        if legacy_detect_intent(message) != tokenizer.tokenize(message)[2]
+    )
+
+    print(f"messages:        {len(messages)}")
+    print(f"legacy:          {legacy_us:.2f} µs/message")
+    print(f"compiled:        {compiled_us:.2f} µs/message")
+    print(f"speedup:         {legacy_us / compiled_us:.2f}x")
+    print(f"intent changes:  {intent_changes}/{len(SAMPLE_MESSAGES)} samples (substring false positives removed)")
+
+if __name__ == "__main__":
+    main()
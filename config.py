@@ -125,6 +125,20 @@ class Config:
                     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )""",
                 
+                """CREATE INDEX IF NOT EXISTS idx_warnings_chat_user
+                    ON warnings (chat_id, user_id, timestamp)""",
+                
+                """CREATE TABLE IF NOT EXISTS sanctions (
+                    chat_id INTEGER,
+                    user_id INTEGER,
+                    kind TEXT,
+                    reason TEXT,
+                    admin_id INTEGER,
+                    created_at REAL,
+                    expires_at REAL,
+                    PRIMARY KEY (chat_id, user_id, kind)
+                )""",
+                
                 """CREATE TABLE IF NOT EXISTS logs (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     action TEXT,
@@ -149,9 +163,45 @@ class Config:
     AI_CONFIG = {
         "name": "GM AI Brain",
         "learning_rate": 0.8,
-        "memory_size": 1000,
+        "memory_size": 1000,  # inputs remembered per user and per group
         "min_confidence": 0.3,
         "knowledge_file": "data/ai_knowledge.pkl",
+        "group_shard_dir": "data/ai_groups",
+        "response_cache_size": 2048,
+        "max_patterns_per_key": 10,
+        "pattern_max_age": 2592000,
+        "prune_budget": 256,
+        "prune_interval": 10,
+        "decay_bucket_seconds": 3600,
+        "decay_half_life": 604800,  # 7 days
+        "decay_fresh_boost": 1.5,
+        "decay_stale_floor": 0.5,
+        "decay_refresh_interval": 60,
+        "max_entries_per_input": 5,
+        "phrase_hash_buckets": 0,  # 0 keeps phrase keys as strings; e.g. 65536 hashes them into int buckets
+        "context_size": 8,  # recent messages kept per chat
+        "context_window": 300,  # seconds a preceding message counts as context
+        "context_boost": 1.3,
+        "context_idle_seconds": 3600,
+        "context_max_chats": 10000,
+        "memory_budgets": {
+            "user_profiles": 5000,
+            "group_knowledge": 500,  # resident group shards
+            "responses": 20000,
+            "word_weights": 50000,
+        },
+        "auto_learn": {
+            "base_rate": 0.2,  # share of group messages learned at target load
+            "min_rate": 0.0,
+            "max_rate": 0.5,  # share learned while idle
+            "lag_target_ms": 50,  # event-loop lag considered full load
+            "queue_target": 4,  # AI queue depth considered full load
+            "queue_limit": 16,  # AI queue depth at which learning stops
+            "group_rate_per_minute": 6,
+            "group_burst": 3,
+            "dedup_window": 600,  # seconds a repeated message is ignored
+        },
+        "intent_lexicons": {},  # extra keywords per intent, e.g. {"greeting": ["assalamualaikum"]}
         "supported_languages": ["bn", "en"],
         "default_language": "bn",
     }
@@ -204,20 +254,52 @@ class Config:
     MODERATION_CONFIG = {
         "max_warnings": 3,
         "warning_expiry_days": 30,
+        "warning_cache_size": 10000,  # (chat, user) warning counts kept in memory
         
+        # Warnings escalate through mute_durations, then a ban past max_warnings;
+        # "warning_escalation": [(warnings, "mute" or "ban", seconds), ...] overrides
         "mute_durations": {
             "1st_warning": 3600,
             "2nd_warning": 86400,
             "3rd_warning": 604800,
         },
+        "sanction_batch_window": 1.0,  # seconds; expiries this close are lifted together
+        "admin_cache_ttl": 600,  # seconds a chat's admin list is trusted
         
         "flood_limit": 5,
+        "flood_window": 10,  # seconds
         "max_message_length": 4000,
         
+        "links": {
+            "blocklist_file": "data/blocked_domains.txt",  # one domain per line
+        },
+        
+        "joins": {
+            "coalesce_window": 5,  # seconds; joins this close share one welcome
+            "raid_window": 60,
+            "raid_threshold": 20,  # joins per raid_window that start raid mode
+            "raid_cooldown": 600,  # quiet seconds before raid mode ends
+            "max_mentions": 20,
+        },
+        
+        "near_duplicates": {
+            "window_size": 200,  # recent messages fingerprinted per chat
+            "window_seconds": 60,
+            "max_users": 3,  # more users posting near-identical text is a spam wave
+            "max_distance": 10,  # SimHash bits that may differ
+            "bands": 8,
+            "min_words": 4,
+            "max_chats": 5000,
+        },
+        
         "blacklist": {
             "words": [
+                "spam", "scam", "fraud", "hack", "cheat",
                 "অশ্লীল", "গালি", "স্প্যাম", "প্রতারণা",
             ],
+            "match_mode": "substring",  # or "word": the words above only match whole words
+            "substrings": [],  # always matched anywhere in the text
+            "domains": ["spam.com", "scam.org", "free-money.com"],
         },
     }
     
@@ -260,6 +342,27 @@ class Config:
         "performance": {
             "cleanup_interval": 3600,
         },
+        
+        # Update handling: chats run concurrently, each chat strictly in order
+        "dispatcher": {
+            "dispatch_workers": 16,  # chats handled at once
+            "dispatch_batch": 8,  # updates of one chat before yielding to others
+            "max_pending": 1000,  # queued updates before fetching pauses
+            "max_tracked_chats": 1000,  # chats with their own latency histogram
+            "drain_timeout": 10,  # seconds to finish queued updates on shutdown
+        },
+        
+        # Outbound message pacing (Telegram: ~30 msg/s overall, ~20 msg/min per group)
+        "send_queue": {
+            "global_rate": 30,  # messages per second
+            "global_burst": 1,
+            "group_per_minute": 20,
+            "group_burst": 3,
+            "private_rate": 1,  # messages per second
+            "private_burst": 3,
+            "max_retries": 3,  # Retry-After retries before a request fails
+            "max_inflight": 32,
+        },
     }
 
 
@@ -4,17 +4,20 @@ Complete Package - No Firebase Required
 """
 
 import asyncio
+import html
 import logging
 import os
 import sys
+import time
 from datetime import datetime
 
-from telegram import Update
+from telegram import ChatPermissions, MessageEntity, Update
 from telegram.ext import (
     Application,
     CommandHandler,
     MessageHandler,
     CallbackQueryHandler,
+    ChatMemberHandler,
     ContextTypes,
     filters
 )
@@ -22,11 +25,16 @@ from telegram.ext import (
 # Local imports
 from config import Config
 from modules.ai_system import SelfLearningAI
+from modules.ai_executor import AsyncAI
+from modules.ai_sampler import LearningSampler
 from modules.game_system import GameSystem
 from modules.app_system import MiniAppsSystem
 from modules.moderation import ModerationSystem
+from modules.moderation_admins import AdminCache
 from modules.economy import VirtualEconomy
 from utils.database import Database
+from utils.chat_dispatcher import ChatOrderedApplication
+from utils.send_queue import SendQueue
 from utils.logger import setup_logger
 
 # Setup logger
@@ -37,25 +45,43 @@ class GroupMasterBot:
     
     def __init__(self):
         self.token = Config.BOT_TOKEN
-        self.app = Application.builder().token(self.token).build()
+        self.send_queue = SendQueue(Config.SYSTEM_CONFIG.get('send_queue'))
+        self.app = (
+            Application.builder()
+            .application_class(ChatOrderedApplication, kwargs=Config.SYSTEM_CONFIG.get('dispatcher', {}))
+            .token(self.token)
+            .rate_limiter(self.send_queue)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
         
         # Initialize all systems
-        self.ai = SelfLearningAI()
+        self.ai = AsyncAI(SelfLearningAI(Config.AI_CONFIG['knowledge_file'], Config.AI_CONFIG))
+        self.learn_sampler = LearningSampler(Config.AI_CONFIG.get('auto_learn'), lambda: self.ai.queue_depth)
         self.games = GameSystem()
         self.apps = MiniAppsSystem()
-        self.moderator = ModerationSystem()
-        self.economy = VirtualEconomy()
         self.db = Database()
+        self.moderator = ModerationSystem(Config.MODERATION_CONFIG, self.db)
+        self.admins = AdminCache(
+            self.app.bot.get_chat_administrators,
+            Config.MODERATION_CONFIG.get('admin_cache_ttl', 600),
+            Config.ADMIN_IDS
+        )
+        self.economy = VirtualEconomy()
         
         # Active sessions
         self.active_games = {}
         self.user_sessions = {}
+        self.learn_tasks = set()
+        self.welcome_tasks = set()
         
         # Statistics
         self.stats = {
             'start_time': datetime.now(),
             'messages_processed': 0,
             'commands_executed': 0,
+            'messages_blocked': 0,
         }
         
         # Register handlers
@@ -96,6 +122,7 @@ class GroupMasterBot:
         # Message handlers
         self.app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
         self.app.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, self.handle_new_members))
+        self.app.add_handler(ChatMemberHandler(self.handle_chat_member, ChatMemberHandler.CHAT_MEMBER))
         
         # Callback handler
         self.app.add_handler(CallbackQueryHandler(self.handle_callback))
@@ -186,6 +213,9 @@ class GroupMasterBot:
         
         # Get database stats
         stats = await self.db.get_statistics()
+        sends = self.send_queue.get_stats()
+        handlers = self.app.get_dispatch_stats(top=0)
+        queued = sum(lane['queued'] for lane in sends['lanes'].values())
         
         status_text = f"""
 ✅ *বট স্ট্যাটাস*
@@ -197,6 +227,8 @@ class GroupMasterBot:
 
 🎮 একটিভ গেমস: {len(self.active_games)}
 🧠 AI লার্নড: {self.ai.get_stats()['total_learned']}
+⚙️ হ্যান্ডলার p95: {handlers['latency']['p95_ms']}ms ({handlers['active_chats']} চ্যাট সক্রিয়)
+📤 সেন্ড কিউ: {queued} (রিপ্লাই অপেক্ষা: {sends['lanes']['reply']['avg_wait_ms']}ms, 429: {sends.get('retry_after', 0)})
         """
         
         await message.edit_text(status_text)
@@ -211,11 +243,9 @@ class GroupMasterBot:
         user_id = update.effective_user.id
         chat_id = update.effective_chat.id
         
-        # Get AI response
-        ai_response = self.ai.generate_response(user_message, user_id, chat_id)
-        
-        # Learn from this interaction
-        self.ai.learn(user_message, ai_response, user_id, chat_id)
+        # Get AI response and learn from this interaction (off the event loop)
+        preceding = self.ai.preceding_message(chat_id)
+        ai_response = await self.ai.respond_and_learn(user_message, user_id, chat_id, preceding)
         
         await update.message.reply_text(f"🤖 *AI:* {ai_response}")
         
@@ -253,6 +283,81 @@ class GroupMasterBot:
         result = await self.apps.dictionary(word)
         await update.message.reply_text(result)
     
+    async def _moderation_target(self, update: Update, right: str):
+        """Replied-to user a moderation command acts on, or None after explaining why not"""
+        message = update.message
+        chat_id = update.effective_chat.id
+        
+        if chat_id > 0:
+            await message.reply_text("❌ এই কমান্ড শুধু গ্রুপে কাজ করে")
+            return None
+        
+        if not await self.admins.is_admin(chat_id, update.effective_user.id, right):
+            await message.reply_text("❌ শুধুমাত্র অ্যাডমিনরা এই কমান্ড ব্যবহার করতে পারেন")
+            return None
+        
+        target = message.reply_to_message.from_user if message.reply_to_message else None
+        if target is None:
+            await message.reply_text("↩️ যাকে চান তার মেসেজে রিপ্লাই করে কমান্ডটি দিন")
+            return None
+        
+        if target.is_bot or await self.admins.is_admin(chat_id, target.id):
+            await message.reply_text("❌ অ্যাডমিন বা বটের বিরুদ্ধে এটি করা যাবে না")
+            return None
+        
+        return target
+    
+    async def command_warn(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /warn command (reply to the user to warn)"""
+        target = await self._moderation_target(update, 'can_restrict_members')
+        if target is None:
+            return
+        
+        chat_id = update.effective_chat.id
+        admin_id = update.effective_user.id
+        reason = ' '.join(context.args) or "No reason given"
+        
+        count = await self.moderator.add_warning(target.id, chat_id, reason, admin_id)
+        text = (
+            f"⚠️ <b>সতর্কবার্তা!</b>\n\n"
+            f"👤 {target.mention_html()}\n"
+            f"📝 কারণ: {html.escape(reason)}\n"
+            f"🔢 সতর্কবার্তা: {count}"
+        )
+        
+        try:
+            sanction = await self.sanction_user(chat_id, target.id, count, reason, admin_id)
+        except Exception as e:
+            logger.error(f"❌ Sanction failed for {target.id} in {chat_id}: {e}")
+            sanction = None
+        
+        if sanction:
+            kind, duration = sanction
+            if kind == 'ban':
+                text += "\n🚫 ব্যান করা হয়েছে"
+            else:
+                text += f"\n🔇 মিউট: {duration // 60} মিনিট"
+        
+        await update.message.reply_text(text, parse_mode='HTML')
+    
+    async def command_kick(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /kick command (reply to the user to remove)"""
+        target = await self._moderation_target(update, 'can_restrict_members')
+        if target is None:
+            return
+        
+        chat_id = update.effective_chat.id
+        try:
+            # Banning then unbanning removes the user but lets them rejoin
+            await context.bot.ban_chat_member(chat_id, target.id)
+            await context.bot.unban_chat_member(chat_id, target.id, only_if_banned=True)
+        except Exception as e:
+            logger.error(f"❌ Kick failed for {target.id} in {chat_id}: {e}")
+            await update.message.reply_text("❌ কিক করা যায়নি, বটের অ্যাডমিন অনুমতি আছে কি?")
+            return
+        
+        await update.message.reply_text(f"👢 {target.mention_html()} কে গ্রুপ থেকে বের করা হয়েছে", parse_mode='HTML')
+    
     async def command_balance(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /balance command"""
         user_id = update.effective_user.id
@@ -303,25 +408,65 @@ class GroupMasterBot:
         # Update statistics
         self.stats['messages_processed'] += 1
         
+        # Cheap moderation checks first; violating messages are never stored or learned
+        links = message.parse_entities([MessageEntity.URL, MessageEntity.TEXT_LINK])
+        urls = [entity.url or link_text for entity, link_text in links.items()]
+        violation = self.moderator.screen_message(user_id, chat_id, text, urls)
+        if violation:
+            self.stats['messages_blocked'] += 1
+            logger.debug(f"🚫 Message from {user_id} in {chat_id} blocked by {violation[0]}: {violation[1]}")
+            return
+        
         # Save message to database
         await self.db.save_message(user_id, chat_id, text)
         
-        # Learn from messages in groups
-        if chat_id < 0:  # Group chat
-            # Auto-learn (20% chance)
-            import random
-            if random.random() < 0.2:
-                ai_response = self.ai.generate_response(text, user_id, chat_id)
-                self.ai.learn(text, ai_response, user_id, chat_id)
+        # Keep recent conversation as AI context; the job gets the context as of now,
+        # not as of when the AI worker reaches it
+        preceding = self.ai.preceding_message(chat_id)
+        self.ai.record_message(chat_id, user_id, text)
+        
+        # Learn from messages in groups (sampled by current load)
+        if chat_id < 0 and self.learn_sampler.should_learn(chat_id, text):
+            # Don't hold up the next update while the AI worker is busy
+            task = asyncio.create_task(self.ai.respond_and_learn(text, user_id, chat_id, preceding, background=True))
+            self.learn_tasks.add(task)
+            task.add_done_callback(self._learn_done)
+    
+    def _learn_done(self, task: asyncio.Task):
+        """Forget a finished auto-learn task and log its failure"""
+        self.learn_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"❌ Auto-learn failed: {task.exception()}")
     
     async def handle_new_members(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle new members joining"""
-        for user in update.message.new_chat_members:
-            if user.is_bot:
-                continue
-            
-            welcome_text = f"""
-🎉 *স্বাগতম {user.mention_html()}!* 🎉
+        """Handle new members joining (welcomed together per chat)"""
+        members = [user for user in update.message.new_chat_members if not user.is_bot]
+        if not members:
+            return
+        
+        # The first join of a batch schedules one welcome for everyone joining meanwhile
+        if self.moderator.joins.record_joins(update.effective_chat.id, members):
+            task = asyncio.create_task(self._welcome_batch(update.message))
+            self.welcome_tasks.add(task)
+            task.add_done_callback(self.welcome_tasks.discard)
+    
+    async def _welcome_batch(self, message):
+        """Welcome a chat's batch of new members with one message and one bonus transaction"""
+        joins = self.moderator.joins
+        await asyncio.sleep(joins.coalesce_window)
+        
+        batch = joins.flush(message.chat_id)
+        if not batch:
+            return
+        members, raid = batch
+        
+        max_mentions = Config.MODERATION_CONFIG.get('joins', {}).get('max_mentions', 20)
+        mentions = ', '.join(user.mention_html() for user in members[:max_mentions])
+        if len(members) > max_mentions:
+            mentions += f" এবং আরও {len(members) - max_mentions} জন"
+        
+        welcome_text = f"""
+🎉 *স্বাগতম {mentions}!* 🎉
 
 🤖 আমি *GROUP MASTER Bot*
 আপনার গ্রুপের AI সহকারী!
@@ -332,12 +477,25 @@ class GroupMasterBot:
 /game - গেম খেলুন
 
 *আমি বাংলা শিখছি!* 🇧🇩
-            """
-            
-            await update.message.reply_text(welcome_text, parse_mode='HTML')
-            
-            # Give welcome bonus
-            await self.db.update_user_balance(user.id, 500, "Welcome bonus")
+        """
+        
+        try:
+            await message.reply_text(welcome_text, parse_mode='HTML')
+        except Exception as e:
+            logger.error(f"❌ Welcome failed in {message.chat_id}: {e}")
+        
+        # No bonuses while the chat is being raided
+        if raid:
+            logger.warning(f"🚨 Join raid in {message.chat_id}: {len(members)} joins, bonuses suppressed")
+            return
+        
+        # Give welcome bonus
+        await self.db.update_users_balance([user.id for user in members], 500, "Welcome bonus")
+    
+    async def handle_chat_member(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Keep cached admin rights in step with promotions and demotions"""
+        change = update.chat_member
+        self.admins.apply_member_update(change.chat.id, change.new_chat_member)
     
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle callback queries"""
@@ -349,14 +507,75 @@ class GroupMasterBot:
         if data == "menu_games":
             await self.command_game(update, context)
     
+    async def _post_init(self, application: Application):
+        """Start background tasks once the event loop is running"""
+        restored = await self.moderator.restore_sanctions()
+        if restored:
+            logger.info(f"🔒 Restored {restored} mutes/bans")
+        await self.start_background_tasks()
+    
+    # ==================== SANCTIONS ====================
+    
+    async def sanction_user(self, chat_id: int, user_id: int, warning_count: int,
+                            reason: str = "", admin_id: int = None):
+        """Mute or ban a user according to the warning escalation; returns (kind, duration) or None"""
+        sanction = self.moderator.warnings.escalation(warning_count)
+        if sanction is None:
+            return None
+        kind, duration = sanction
+        until = int(time.time() + duration) if duration else None
+        
+        if kind == 'mute':
+            await self.app.bot.restrict_chat_member(
+                chat_id, user_id, ChatPermissions.no_permissions(), until_date=until
+            )
+        else:
+            await self.app.bot.ban_chat_member(chat_id, user_id, until_date=until)
+        
+        await self.moderator.apply_sanction(chat_id, user_id, kind, duration, reason, admin_id)
+        return kind, duration
+    
+    async def _lift_sanctions(self, chat_id: int, lifts):
+        """Unmute/unban a chat's expired sanctions together"""
+        async def lift(user_id: int, kind: str):
+            if kind == 'mute':
+                await self.app.bot.restrict_chat_member(chat_id, user_id, ChatPermissions.all_permissions())
+            else:
+                await self.app.bot.unban_chat_member(chat_id, user_id, only_if_banned=True)
+        
+        results = await asyncio.gather(*(lift(user_id, kind) for user_id, kind in lifts), return_exceptions=True)
+        failed = [result for result in results if isinstance(result, Exception)]
+        if failed:
+            logger.warning(f"⚠️ {len(failed)}/{len(lifts)} sanctions in {chat_id} could not be lifted: {failed[0]}")
+        else:
+            logger.info(f"🔓 Lifted {len(lifts)} expired sanctions in {chat_id}")
+    
+    async def _post_shutdown(self, application: Application):
+        """Flush AI knowledge and stop worker threads"""
+        await self.ai.save_knowledge()
+        self.ai.shutdown()
+    
     async def start_background_tasks(self):
         """Start background tasks"""
         async def auto_save():
             """Auto-save AI knowledge"""
             while True:
                 await asyncio.sleep(300)  # 5 minutes
-                self.ai.save_knowledge()
-                logger.info("💾 AI knowledge auto-saved")
+                if await self.ai.save_knowledge():
+                    metrics = self.ai.get_metrics()
+                    sampler = self.learn_sampler.get_stats()
+                    logger.info(
+                        f"💾 AI knowledge auto-saved "
+                        f"(queue: {metrics['queue_depth']}, avg wait: {metrics['avg_wait_ms']}ms, "
+                        f"learn rate: {sampler['rate']:.0%}, lag: {sampler['lag_ms']}ms)"
+                    )
+        
+        async def prune_knowledge():
+            """Expire old AI patterns a small batch at a time"""
+            interval = Config.AI_CONFIG.get('prune_interval', 10)
+            while True:
+                await asyncio.sleep(interval)
+                await self.ai.prune()
         
         async def cleanup():
             """Cleanup old games"""
@@ -376,20 +595,25 @@ class GroupMasterBot:
                 
                 if to_remove:
                     logger.info(f"🧹 Cleaned up {len(to_remove)} old games")
+                
+                # Drop flood-control state of idle users
+                self.moderator.sweep_flood()
+                self.moderator.joins.sweep()
         
         # Start tasks
         asyncio.create_task(auto_save())
+        asyncio.create_task(prune_knowledge())
         asyncio.create_task(cleanup())
+        asyncio.create_task(self.learn_sampler.monitor_lag())
+        asyncio.create_task(self.moderator.run_expiry(self._lift_sanctions))
     
     def run(self):
         """Run the bot"""
         logger.info("🚀 Starting GROUP MASTER Bot...")
         
-        # Start background tasks
-        asyncio.run(self.start_background_tasks())
-        
-        # Start polling
-        self.app.run_polling(drop_pending_updates=True)
+        # Start polling (background tasks start from post_init)
+        # chat_member updates (admin changes) are only sent when requested
+        self.app.run_polling(drop_pending_updates=True, allowed_updates=Update.ALL_TYPES)
 
 def main():
     """Main function"""
@@ -0,0 +1,91 @@
+"""
+Response Cache for the Self-Learning AI
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Set
+
+class ResponseCache:
+    """LRU cache of generated responses with token-based invalidation
+
+    Every entry is indexed by the knowledge keys its lookup read from, so
+    learning or pruning a key drops exactly the entries that could change.
+    """
+
+    def __init__(self, max_size: int = 2048):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.token_index = {}
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidations': 0,
+        }
+
+    def get(self, key: Hashable) -> Any:
+        """Get a cached lookup result (None on a miss) and mark it as recently used"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return entry[0]
+
+    def put(self, key: Hashable, tokens: Iterable[Hashable], response: Any):
+        """Cache a response together with the tokens it depends on"""
+        if self.max_size <= 0:
+            return
+
+        if key in self.entries:
+            self._remove(key)
+
+        tokens = frozenset(tokens)
+        self.entries[key] = (response, tokens)
+        for token in tokens:
+            self.token_index.setdefault(token, set()).add(key)
+
+        while len(self.entries) > self.max_size:
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+            self.stats['evictions'] += 1
+
+    def invalidate(self, tokens: Iterable[Hashable]) -> int:
+        """Drop every entry that depends on any of the given tokens"""
+        stale: Set[Hashable] = set()
+        for token in tokens:
+            keys = self.token_index.get(token)
+            if keys:
+                stale.update(keys)
+
+        for key in stale:
+            self._remove(key)
+
+        self.stats['invalidations'] += len(stale)
+        return len(stale)
+
+    def clear(self):
+        """Drop all entries"""
+        self.entries.clear()
+        self.token_index.clear()
+
+    def _remove(self, key: Hashable):
+        """Remove an entry and its index references"""
+        _, tokens = self.entries.pop(key)
+        for token in tokens:
+            keys = self.token_index.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.token_index[token]
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'size': len(self.entries),
+            'hit_rate': round(self.stats['hits'] / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,103 @@
+"""
+Per-Chat Conversation Context for the Self-Learning AI
+"""
+
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+class ChatRing:
+    """Fixed-size ring of a chat's last messages in compact arrays"""
+
+    __slots__ = ('user_ids', 'timestamps', 'texts', 'head', 'count')
+
+    def __init__(self, size: int):
+        self.user_ids = array('q', [0]) * size
+        self.timestamps = array('d', [0.0]) * size
+        self.texts = [None] * size
+        self.head = 0  # next slot to write
+        self.count = 0
+
+    def append(self, user_id: int, text: str, timestamp: float):
+        index = self.head
+        self.user_ids[index] = user_id or 0
+        self.timestamps[index] = timestamp
+        self.texts[index] = text
+        self.head = (index + 1) % len(self.texts)
+        self.count = min(self.count + 1, len(self.texts))
+
+    def newest_first(self):
+        """Yield (user_id, text, timestamp) from the newest message back"""
+        size = len(self.texts)
+        for offset in range(1, self.count + 1):
+            index = (self.head - offset) % size
+            yield self.user_ids[index], self.texts[index], self.timestamps[index]
+
+class ConversationBuffer:
+    """Last N messages of every active chat, kept in memory
+
+    Chats are kept in least-recently-active order; chats idle for longer
+    than `idle_seconds`, or beyond `max_chats`, are dropped as new
+    messages arrive. Messages are recorded and read on the event loop;
+    a job for the AI worker gets its context text captured up front.
+    """
+
+    def __init__(self, size: int = 8, idle_seconds: float = 3600, max_chats: int = 10000):
+        self.size = size
+        self.idle_seconds = idle_seconds
+        self.max_chats = max_chats
+        self.chats = OrderedDict()  # chat_id -> (ChatRing, last active)
+        self.evictions = 0
+
+    def record(self, chat_id: int, user_id: int, text: str, timestamp: float = None):
+        """Append a message to its chat's ring"""
+        timestamp = timestamp or time.time()
+        entry = self.chats.get(chat_id)
+        ring = entry[0] if entry else ChatRing(self.size)
+        ring.append(user_id, text.lower().strip(), timestamp)
+        self.chats[chat_id] = (ring, timestamp)
+        self.chats.move_to_end(chat_id)
+        self.evict_idle(timestamp)
+
+    def evict_idle(self, now: float = None) -> int:
+        """Drop idle chats and chats beyond max_chats; returns the number dropped"""
+        cutoff = (now or time.time()) - self.idle_seconds
+        evicted = 0
+        while self.chats:
+            _, (_, last_active) = next(iter(self.chats.items()))
+            if last_active >= cutoff and len(self.chats) <= self.max_chats:
+                break
+            self.chats.popitem(last=False)
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def recent(self, chat_id: int, limit: int = None) -> List[Tuple[int, str, float]]:
+        """Recent (user_id, text, timestamp) messages of a chat, oldest first"""
+        entry = self.chats.get(chat_id)
+        if entry is None:
+            return []
+        messages = list(entry[0].newest_first())[:limit]
+        messages.reverse()
+        return messages
+
+    def latest(self, chat_id: int, max_age: float) -> Optional[str]:
+        """The newest message of a chat, if recent enough"""
+        entry = self.chats.get(chat_id)
+        if entry is None:
+            return None
+        for _, text, timestamp in entry[0].newest_first():
+            return text if timestamp >= time.time() - max_age else None
+        return None
+
+    def clear(self):
+        self.chats.clear()
+
+    def get_stats(self) -> Dict:
+        """Get context buffer statistics"""
+        return {
+            'chats': len(self.chats),
+            'size': self.size,
+            'evictions': self.evictions,
+        }
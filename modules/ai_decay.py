@@ -0,0 +1,60 @@
+"""
+Time-Decay Scoring for the Self-Learning AI
+"""
+
+import math
+import time
+
+class DecayTable:
+    """Precomputed exponential time-decay multipliers per age bucket
+
+    Patterns store the integer bucket they were learned in, so scoring a
+    candidate is a single list lookup by bucket age. The current bucket
+    is refreshed at most once per `refresh_interval` seconds.
+    """
+
+    def __init__(self, bucket_seconds: int = 3600, half_life: float = 604800,
+                 fresh_boost: float = 1.5, stale_floor: float = 0.5,
+                 horizon: float = 2592000, refresh_interval: float = 60):
+        self.bucket_seconds = bucket_seconds
+        self.refresh_interval = refresh_interval
+
+        # multiplier(age) = floor + (boost - floor) * 2^(-age / half_life)
+        buckets = int(math.ceil(horizon / bucket_seconds)) + 1
+        self.multipliers = [
+            stale_floor + (fresh_boost - stale_floor) * 0.5 ** (age * bucket_seconds / half_life)
+            for age in range(buckets)
+        ]
+        self.stale_multiplier = stale_floor
+        self.current_bucket = 0
+        self.next_refresh = 0.0
+        self.refresh()
+
+    def bucket_of(self, timestamp: float) -> int:
+        """Bucket index for a timestamp"""
+        return int(timestamp // self.bucket_seconds)
+
+    def refresh(self) -> bool:
+        """Update the current bucket; returns True if it advanced"""
+        now = time.time()
+        self.next_refresh = time.monotonic() + self.refresh_interval
+        bucket = self.bucket_of(now)
+        if bucket == self.current_bucket:
+            return False
+        self.current_bucket = bucket
+        return True
+
+    def maybe_refresh(self) -> bool:
+        """Refresh if the refresh interval has passed"""
+        if time.monotonic() < self.next_refresh:
+            return False
+        return self.refresh()
+
+    def multiplier(self, bucket: int) -> float:
+        """Decay multiplier for a pattern learned in `bucket`"""
+        age = self.current_bucket - bucket
+        if age < 0:
+            return self.multipliers[0]
+        if age >= len(self.multipliers):
+            return self.stale_multiplier
+        return self.multipliers[age]
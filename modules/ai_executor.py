@@ -0,0 +1,222 @@
+"""
+Async Executor Facade for the Self-Learning AI
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from modules.ai_system import SelfLearningAI
+
+class AsyncAI:
+    """Runs SelfLearningAI work off the event loop
+
+    All inference and learning calls are dispatched to a single worker
+    thread, so every mutation of the knowledge base is serialized without
+    holding up the event loop. Disk writes go to a separate I/O thread.
+
+    Waiting jobs run by priority, then in order: interactive replies go
+    before maintenance jobs, and passive learning goes last, so a reply
+    never waits behind a backlog of sampled messages.
+    """
+
+    INTERACTIVE, NORMAL, BACKGROUND = 0, 1, 2
+
+    def __init__(self, ai: SelfLearningAI, latency_samples: int = 1024):
+        self.ai = ai
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai")
+        self._jobs = []  # (priority, seq, job, future) waiting for the worker
+        self._jobs_lock = threading.Lock()
+        self._seq = itertools.count()
+        self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-io")
+        self._metrics_lock = threading.Lock()
+        self._pending = 0
+        self._latencies = defaultdict(lambda: deque(maxlen=latency_samples))
+        self.metrics = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'max_queue_depth': 0,
+            'total_wait_ms': 0.0,
+            'total_run_ms': 0.0,
+        }
+
+    # ==================== DISPATCH ====================
+
+    async def _run(self, op: str, func: Callable, *args, priority: int = NORMAL):
+        """Run func(*args) on the AI worker thread and record timings"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                self._record(op, (started - submitted) * 1000, (finished - started) * 1000)
+
+        self._pending += 1
+        self.metrics['submitted'] += 1
+        self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], self._pending)
+        try:
+            entry = (priority, next(self._seq), job, future)
+            with self._jobs_lock:
+                heapq.heappush(self._jobs, entry)
+                try:
+                    # One worker call per job; each runs whichever waiting job is most urgent
+                    self._executor.submit(self._run_next, loop)
+                except RuntimeError:
+                    # Executor shut down: take the job back out
+                    self._jobs.remove(entry)
+                    heapq.heapify(self._jobs)
+                    raise
+            result = await future
+        except Exception:
+            self.metrics['failed'] += 1
+            raise
+        finally:
+            self._pending -= 1
+        self.metrics['completed'] += 1
+        return result
+
+    def _run_next(self, loop: asyncio.AbstractEventLoop):
+        """Run the most urgent waiting job (on the worker thread)"""
+        with self._jobs_lock:
+            _, _, job, future = heapq.heappop(self._jobs)
+        try:
+            result, error = job(), None
+        except Exception as e:
+            result, error = None, e
+        loop.call_soon_threadsafe(self._settle, future, result, error)
+
+    @staticmethod
+    def _settle(future: asyncio.Future, result, error: Exception):
+        """Hand a job's outcome to its waiter (on the event loop)"""
+        if future.cancelled():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _record(self, op: str, wait_ms: float, run_ms: float):
+        """Record queue wait and run time of a finished job"""
+        with self._metrics_lock:
+            self.metrics['total_wait_ms'] += wait_ms
+            self.metrics['total_run_ms'] += run_ms
+            self._latencies[op].append(wait_ms + run_ms)
+
+    # ==================== AI OPERATIONS ====================
+
+    async def generate_response(self, input_text: str, user_id: int = None, group_id: int = None,
+                                context: str = None) -> str:
+        """Generate a response without blocking the event loop"""
+        return await self._run('generate', self.ai.generate_response, input_text, user_id, group_id, context,
+                               priority=self.INTERACTIVE)
+
+    async def learn(self, input_text: str, response: str, user_id: int = None, group_id: int = None):
+        """Learn from an input/response pair without blocking the event loop"""
+        return await self._run('learn', self.ai.learn, input_text, response, user_id, group_id)
+
+    async def respond_and_learn(self, input_text: str, user_id: int = None, group_id: int = None,
+                                context: str = None, background: bool = False) -> str:
+        """Generate a response and learn from it in a single worker job
+
+        `background` marks passive learning, which waits for every other job.
+        """
+        def job():
+            response = self.ai.generate_response(input_text, user_id, group_id, context)
+            self.ai.learn(input_text, response, user_id, group_id)
+            return response
+
+        priority = self.BACKGROUND if background else self.INTERACTIVE
+        return await self._run('respond_and_learn', job, priority=priority)
+
+    def record_message(self, chat_id: int, user_id: int, text: str):
+        """Record conversation context directly; it is cheap and stays on the event loop"""
+        self.ai.record_message(chat_id, user_id, text)
+
+    def preceding_message(self, chat_id: int):
+        """Capture a chat's context text for a job about to be submitted"""
+        return self.ai.preceding_message(chat_id)
+
+    async def prune(self, budget: int = None) -> int:
+        """Run one bounded pruning step on the AI worker"""
+        return await self._run('prune', self.ai.prune_step, budget)
+
+    async def memory_usage(self) -> Dict[str, int]:
+        """Report approximate bytes per knowledge section"""
+        return await self._run('memory_usage', self.ai.memory_usage)
+
+    async def snapshot(self):
+        """Take a consistent, read-only knowledge snapshot for analytics"""
+        return await self._run('snapshot', self.ai.snapshot)
+
+    async def save_knowledge(self) -> bool:
+        """Save knowledge from a consistent snapshot
+
+        The copy-on-write snapshot is taken on the AI worker, between two
+        jobs, which only copies section containers. Pickling and writing
+        happen on the I/O thread while requests keep flowing.
+        """
+        data = await self._run('snapshot', self.ai.snapshot_knowledge)
+        loop = asyncio.get_running_loop()
+        saved = await loop.run_in_executor(self._io_executor, self.ai.write_snapshot, data)
+        # Live stats only change on the AI worker
+        await self._run('record_save', self.ai.record_save, data)
+        return saved
+
+    async def save_group(self, group_id: int) -> bool:
+        """Save a single group's shard"""
+        snapshot = await self._run('snapshot', self.ai.groups.snapshot, [group_id])
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_executor, self.ai.groups.write, snapshot)
+
+    def get_stats(self) -> Dict:
+        """Get AI statistics"""
+        return self.ai.get_stats()
+
+    # ==================== METRICS ====================
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for or running on the AI worker"""
+        return self._pending
+
+    def get_metrics(self) -> Dict:
+        """Get queue depth and latency metrics"""
+        metrics = dict(self.metrics)
+        metrics['queue_depth'] = self._pending
+
+        # Timings are recorded for every job that ran, failed or not
+        finished = max(metrics['completed'] + metrics['failed'], 1)
+        metrics['avg_wait_ms'] = round(metrics['total_wait_ms'] / finished, 3)
+        metrics['avg_run_ms'] = round(metrics['total_run_ms'] / finished, 3)
+
+        with self._metrics_lock:
+            samples = {op: sorted(values) for op, values in self._latencies.items()}
+
+        metrics['latency_ms'] = {
+            op: {
+                'p50': round(values[len(values) // 2], 3),
+                'p99': round(values[min(len(values) - 1, int(len(values) * 0.99))], 3),
+                'max': round(values[-1], 3),
+            }
+            for op, values in samples.items() if values
+        }
+        metrics['cache'] = self.ai.get_cache_stats()
+        metrics['shards'] = self.ai.get_shard_stats()
+        metrics['context'] = self.ai.get_context_stats()
+        return metrics
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=wait)
+        self._io_executor.shutdown(wait=wait)
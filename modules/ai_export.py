@@ -0,0 +1,349 @@
+"""
+Columnar Export/Import for AI Knowledge
+Portable NumPy archive: safe to load (no pickle) and memory-mappable
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+from modules.ai_system import SelfLearningAI
+
+FORMAT_VERSION = 2
+
+# Column name -> dtype. Strings are int32 ids into the string table;
+# user and group ids of 0 stand for "not set". Pattern keys are string
+# ids, or -1 with the phrase hash bucket in pattern_key_hashes.
+COLUMNS = {
+    'pattern_keys': np.int32, 'pattern_key_hashes': np.int64, 'pattern_offsets': np.int64,
+    'pattern_input': np.int32, 'pattern_response': np.int32, 'pattern_intent': np.int32,
+    'pattern_weight': np.float32, 'pattern_timestamp': np.float64,
+    'pattern_user': np.int64, 'pattern_group': np.int64,
+
+    'user_ids': np.int64, 'user_offsets': np.int64,
+    'user_learning_count': np.int32, 'user_last_learned': np.float64,
+    'user_input': np.int32, 'user_response': np.int32,
+    'user_count': np.int32, 'user_last_used': np.float64,
+
+    'group_ids': np.int64, 'group_offsets': np.int64,
+    'group_input': np.int32, 'group_response': np.int32,
+    'group_user': np.int64, 'group_timestamp': np.float64,
+
+    'response_keys': np.int32, 'response_offsets': np.int64,
+    'response_input': np.int32, 'response_timestamp': np.float64,
+    'response_user': np.int64, 'response_group': np.int64,
+
+    'word_keys': np.int32, 'word_weights': np.float32,
+
+    'string_offsets': np.int64, 'string_data': np.uint8,
+}
+
+class StringTable:
+    """Interns strings into sequential ids while exporting"""
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def add(self, text: str) -> int:
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def to_arrays(self):
+        """Concatenated UTF-8 bytes plus an offsets array (n + 1 entries)"""
+        encoded = [text.encode('utf-8') for text in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+# ==================== EXPORT ====================
+
+def export_knowledge(ai: SelfLearningAI, path: str) -> Dict:
+    """Write the AI's knowledge (including every group shard) as a columnar archive"""
+    strings = StringTable()
+    columns = defaultdict(list)
+    knowledge = ai.knowledge
+
+    # Patterns as postings: one row per pattern, grouped by key
+    columns['pattern_offsets'].append(0)
+    for key, bucket in knowledge['patterns'].items():
+        if not bucket:
+            continue
+        if isinstance(key, int):
+            columns['pattern_keys'].append(-1)
+            columns['pattern_key_hashes'].append(key)
+        else:
+            columns['pattern_keys'].append(strings.add(key))
+            columns['pattern_key_hashes'].append(0)
+        for pattern in bucket:
+            columns['pattern_input'].append(strings.add(pattern['input']))
+            columns['pattern_response'].append(strings.add(pattern['response']))
+            columns['pattern_intent'].append(strings.add(pattern['intent']))
+            columns['pattern_weight'].append(pattern['weight'])
+            columns['pattern_timestamp'].append(pattern['timestamp'])
+            columns['pattern_user'].append(pattern['user_id'] or 0)
+            columns['pattern_group'].append(pattern['group_id'] or 0)
+        columns['pattern_offsets'].append(len(columns['pattern_input']))
+
+    # User profiles
+    columns['user_offsets'].append(0)
+    for user_id, user_data in knowledge['user_profiles'].items():
+        columns['user_ids'].append(user_id)
+        columns['user_learning_count'].append(user_data['learning_count'])
+        columns['user_last_learned'].append(user_data['last_learned'])
+        for input_text, entries in user_data['patterns'].items():
+            for entry in entries:
+                columns['user_input'].append(strings.add(input_text))
+                columns['user_response'].append(strings.add(entry['response']))
+                columns['user_count'].append(entry['count'])
+                columns['user_last_used'].append(entry['last_used'])
+        columns['user_offsets'].append(len(columns['user_input']))
+
+    # Group shards
+    columns['group_offsets'].append(0)
+    for group_id, group_data in ai.groups.iter_shards():
+        columns['group_ids'].append(group_id)
+        for input_text, entries in group_data.items():
+            for entry in entries:
+                columns['group_input'].append(strings.add(input_text))
+                columns['group_response'].append(strings.add(entry['response']))
+                columns['group_user'].append(entry['user_id'] or 0)
+                columns['group_timestamp'].append(entry['timestamp'])
+        columns['group_offsets'].append(len(columns['group_input']))
+
+    # Responses
+    columns['response_offsets'].append(0)
+    for response, entries in knowledge['responses'].items():
+        columns['response_keys'].append(strings.add(response))
+        for entry in entries:
+            columns['response_input'].append(strings.add(entry['input']))
+            columns['response_timestamp'].append(entry['timestamp'])
+            columns['response_user'].append(entry['user_id'] or 0)
+            columns['response_group'].append(entry['group_id'] or 0)
+        columns['response_offsets'].append(len(columns['response_input']))
+
+    # Word weights
+    for word, weight in knowledge['word_weights'].items():
+        columns['word_keys'].append(strings.add(word))
+        columns['word_weights'].append(weight)
+
+    string_data, string_offsets = strings.to_arrays()
+    arrays = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in COLUMNS.items()}
+    arrays['string_data'] = string_data
+    arrays['string_offsets'] = string_offsets
+
+    stats = dict(knowledge['stats'])
+    stats['evictions'] = dict(stats.get('evictions', {}))
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'created_at': time.time(),
+        'counts': {
+            'keys': len(columns['pattern_keys']),
+            'patterns': len(columns['pattern_input']),
+            'users': len(columns['user_ids']),
+            'groups': len(columns['group_ids']),
+            'responses': len(columns['response_keys']),
+            'words': len(columns['word_keys']),
+            'strings': len(strings.strings),
+        },
+        'stats': stats,
+    }
+
+    # Write into a temporary directory, then swap it into place
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), array, allow_pickle=False)
+    with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return meta['counts']
+
+# ==================== IMPORT ====================
+
+class KnowledgeArchive:
+    """Read-only view of a columnar archive with memory-mapped columns
+
+    Columns and single strings are read in place, without copying the
+    archive; column() converts a whole column to a list.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+
+        if self.meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported knowledge archive version: {self.meta.get('format_version')}")
+
+        self.arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r', allow_pickle=False)
+            for name in COLUMNS
+        }
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def string(self, string_id: int) -> str:
+        """Decode a single string without touching the rest of the table"""
+        offsets = self.arrays['string_offsets']
+        start, end = offsets[string_id], offsets[string_id + 1]
+        return bytes(self.arrays['string_data'][start:end]).decode('utf-8')
+
+    def strings(self) -> List[str]:
+        """Decode the whole string table"""
+        data = bytes(self.arrays['string_data'])
+        offsets = self.arrays['string_offsets'].tolist()
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+    def column(self, name: str) -> list:
+        """A whole column as a Python list (a full copy)"""
+        return self.arrays[name].tolist()
+
+def import_knowledge(ai: SelfLearningAI, path: str) -> Dict:
+    """Replace the AI's knowledge with the contents of a columnar archive
+
+    The whole archive is parsed (and copied into new structures) before
+    anything in `ai` changes, so a damaged archive leaves the current
+    knowledge intact. Group shards not in the archive are then deleted,
+    including their files.
+    """
+    archive = KnowledgeArchive(path)
+    strings = archive.strings()
+    col = archive.column
+    knowledge = ai._empty_knowledge()
+    shards = {}
+
+    def none_if_zero(value):
+        return value or None
+
+    # Patterns
+    inputs, responses, intents = col('pattern_input'), col('pattern_response'), col('pattern_intent')
+    weights, timestamps = col('pattern_weight'), col('pattern_timestamp')
+    users, groups = col('pattern_user'), col('pattern_group')
+    offsets = col('pattern_offsets')
+    key_hashes = col('pattern_key_hashes')
+    bucket_of = ai.decay.bucket_of
+    for index, key_id in enumerate(col('pattern_keys')):
+        bucket = [
+            dict(
+                input=strings[inputs[row]],
+                response=strings[responses[row]],
+                timestamp=timestamps[row],
+                bucket=bucket_of(timestamps[row]),
+                weight=weights[row],
+                user_id=none_if_zero(users[row]),
+                group_id=none_if_zero(groups[row]),
+                intent=strings[intents[row]],
+            )
+            for row in range(offsets[index], offsets[index + 1])
+        ]
+        key = strings[key_id] if key_id >= 0 else key_hashes[index]
+        knowledge['patterns'][key] = bucket
+    ai._migrate_patterns(knowledge)  # heaps and age index
+
+    # User profiles (exported in LRU order)
+    inputs, responses = col('user_input'), col('user_response')
+    counts, last_used = col('user_count'), col('user_last_used')
+    offsets = col('user_offsets')
+    learning_counts, last_learned = col('user_learning_count'), col('user_last_learned')
+    for index, user_id in enumerate(col('user_ids')):
+        patterns = OrderedDict()
+        for row in range(offsets[index], offsets[index + 1]):
+            patterns.setdefault(strings[inputs[row]], []).append({
+                'response': strings[responses[row]],
+                'count': counts[row],
+                'last_used': last_used[row],
+            })
+        knowledge['user_profiles'][user_id] = {
+            'patterns': patterns,
+            'preferences': defaultdict(float),
+            'learning_count': learning_counts[index],
+            'last_learned': last_learned[index],
+        }
+
+    # Group shards
+    inputs, responses = col('group_input'), col('group_response')
+    group_users, group_timestamps = col('group_user'), col('group_timestamp')
+    offsets = col('group_offsets')
+    for index, group_id in enumerate(col('group_ids')):
+        group_data = OrderedDict()
+        for row in range(offsets[index], offsets[index + 1]):
+            group_data.setdefault(strings[inputs[row]], []).append({
+                'response': strings[responses[row]],
+                'user_id': none_if_zero(group_users[row]),
+                'timestamp': group_timestamps[row],
+            })
+        shards[group_id] = group_data
+
+    # Responses
+    inputs, timestamps = col('response_input'), col('response_timestamp')
+    users, groups = col('response_user'), col('response_group')
+    offsets = col('response_offsets')
+    for index, response_id in enumerate(col('response_keys')):
+        knowledge['responses'][strings[response_id]] = [
+            {
+                'input': strings[inputs[row]],
+                'timestamp': timestamps[row],
+                'user_id': none_if_zero(users[row]),
+                'group_id': none_if_zero(groups[row]),
+            }
+            for row in range(offsets[index], offsets[index + 1])
+        ]
+
+    # Word weights
+    for word_id, weight in zip(col('word_keys'), col('word_weights')):
+        knowledge['word_weights'][strings[word_id]] = weight
+
+    stats = archive.meta['stats']
+    stats['evictions'] = defaultdict(int, stats.get('evictions', {}))
+    stats['decay_bucket_seconds'] = ai.decay.bucket_seconds
+    knowledge['stats'].update(stats)
+
+    if not ai.groups.replace(shards):
+        raise RuntimeError(f"Could not write the group shards imported from {path}")
+    ai.knowledge = knowledge
+    ai.response_cache.clear()
+    return archive.meta['counts']
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Export or import AI knowledge as a columnar archive")
+    parser.add_argument('action', choices=['export', 'import', 'inspect'])
+    parser.add_argument('archive', help="Archive directory")
+    parser.add_argument('--knowledge', default="data/ai_knowledge.pkl", help="AI knowledge file")
+    args = parser.parse_args()
+
+    if args.action == 'inspect':
+        archive = KnowledgeArchive(args.archive)
+        print(json.dumps(archive.meta['counts'], indent=2))
+        for name, array in archive.arrays.items():
+            print(f"{name:22} {str(array.dtype):8} {array.shape[0]:>10}")
+        return
+
+    from config import Config
+
+    ai = SelfLearningAI(args.knowledge, Config.AI_CONFIG)
+    if args.action == 'export':
+        counts = export_knowledge(ai, args.archive)
+        print(f"✅ Exported to {args.archive}: {counts}")
+    else:
+        counts = import_knowledge(ai, args.archive)
+        ai.save_knowledge()
+        print(f"✅ Imported from {args.archive}: {counts}")
+
+if __name__ == "__main__":
+    main()
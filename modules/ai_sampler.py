@@ -0,0 +1,133 @@
+"""
+Load-Aware Sampler for Passive AI Learning
+"""
+
+import asyncio
+import random
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Dict
+
+from modules.ai_tokenizer import Tokenizer
+
+class LearningSampler:
+    """Decides which group messages are worth passive learning
+
+    The sampling rate follows load: it rises towards `max_rate` while the
+    bot is idle and falls towards `min_rate` as event-loop lag or the AI
+    queue depth pass their targets; nothing is sampled while the AI queue
+    holds `queue_limit` jobs or more. Sampled messages then go through a
+    near-duplicate filter and a per-group token bucket, so one busy group
+    cannot take the whole learning budget.
+    """
+
+    REPEAT_RE = re.compile(r'(.)\1+')
+
+    def __init__(self, config: Dict = None, queue_depth: Callable[[], int] = None):
+        config = config or {}
+        self.base_rate = config.get('base_rate', 0.2)
+        self.min_rate = config.get('min_rate', 0.0)
+        self.max_rate = config.get('max_rate', 0.5)
+        self.lag_target_ms = config.get('lag_target_ms', 50)
+        self.queue_target = config.get('queue_target', 4)
+        self.queue_limit = config.get('queue_limit', 16)
+        self.lag_interval = config.get('lag_interval', 0.5)
+        self.group_rate = config.get('group_rate_per_minute', 6) / 60
+        self.group_burst = config.get('group_burst', 3)
+        self.max_groups = config.get('max_groups', 10000)
+        self.dedup_window = config.get('dedup_window', 600)
+        self.dedup_size = config.get('dedup_size', 4096)
+        self.queue_depth = queue_depth or (lambda: 0)
+
+        self.lag_ms = 0.0
+        self.group_buckets = OrderedDict()  # chat_id -> [tokens, last refill]
+        self.recent = OrderedDict()  # (chat_id, normalized text) -> last seen
+        self.stats = {
+            'considered': 0,
+            'sampled': 0,
+            'shed': 0,
+            'duplicates': 0,
+            'capped': 0,
+        }
+
+    # ==================== LOAD ====================
+
+    async def monitor_lag(self):
+        """Measure event-loop lag as the oversleep of a periodic timer"""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            # Smooth, but let spikes show up immediately
+            self.lag_ms = max(lag_ms, self.lag_ms * 0.8 + lag_ms * 0.2)
+
+    def current_rate(self) -> float:
+        """Sampling rate for the current load"""
+        pressure = max(
+            self.lag_ms / self.lag_target_ms,
+            self.queue_depth() / self.queue_target,
+        )
+        if pressure <= 0:
+            return self.max_rate
+        return min(self.max_rate, max(self.min_rate, self.base_rate / pressure))
+
+    # ==================== FILTERS ====================
+
+    def _normalize(self, text: str) -> str:
+        """Reduce a message to its words so trivial variants compare equal"""
+        text = self.REPEAT_RE.sub(r'\1', text.lower())
+        return ' '.join(Tokenizer.WORD_RE.findall(text))
+
+    def _is_duplicate(self, chat_id: int, text: str, now: float) -> bool:
+        """Check and record a message in the recent-message window"""
+        key = (chat_id, self._normalize(text))
+        last_seen = self.recent.pop(key, None)
+        self.recent[key] = now
+
+        while len(self.recent) > self.dedup_size:
+            self.recent.popitem(last=False)
+
+        return last_seen is not None and now - last_seen < self.dedup_window
+
+    def _take_group_token(self, chat_id: int, now: float) -> bool:
+        """Take one learning token from the group's bucket"""
+        bucket = self.group_buckets.pop(chat_id, None) or [self.group_burst, now]
+        tokens = min(self.group_burst, bucket[0] + (now - bucket[1]) * self.group_rate)
+        allowed = tokens >= 1
+        self.group_buckets[chat_id] = [tokens - 1 if allowed else tokens, now]
+
+        while len(self.group_buckets) > self.max_groups:
+            self.group_buckets.popitem(last=False)
+
+        return allowed
+
+    def should_learn(self, chat_id: int, text: str) -> bool:
+        """Decide whether to learn from a message (cheapest checks first)"""
+        self.stats['considered'] += 1
+
+        if self.queue_depth() >= self.queue_limit or random.random() >= self.current_rate():
+            self.stats['shed'] += 1
+            return False
+
+        now = time.monotonic()
+        if self._is_duplicate(chat_id, text, now):
+            self.stats['duplicates'] += 1
+            return False
+
+        if not self._take_group_token(chat_id, now):
+            self.stats['capped'] += 1
+            return False
+
+        self.stats['sampled'] += 1
+        return True
+
+    def get_stats(self) -> Dict:
+        """Get sampler statistics"""
+        return {
+            **self.stats,
+            'rate': round(self.current_rate(), 3),
+            'lag_ms': round(self.lag_ms, 1),
+            'tracked_groups': len(self.group_buckets),
+        }
@@ -0,0 +1,209 @@
+"""
+Group Knowledge Shards for the Self-Learning AI
+"""
+
+import os
+import pickle
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+class GroupShardStore:
+    """Group-scoped knowledge kept as one shard file per group
+
+    Only recently used groups stay resident. Least recently used shards
+    are unloaded once `max_resident` is exceeded and reloaded on demand.
+    Modified shards are serialized into a write-back buffer, which is
+    consulted before the file so a reload never sees a stale shard.
+    
+    Snapshots hand out the live shard objects and park them in the same
+    buffer until written; a shard shared with a snapshot is copied before
+    it is next modified (see get_writable).
+    """
+
+    SHARD_PATTERN = re.compile(r'^group_(-?\d+)\.pkl$')
+
+    def __init__(self, shard_dir: str, max_resident: int = 500):
+        self.shard_dir = shard_dir
+        self.max_resident = max_resident
+        self.resident = OrderedDict()
+        self.dirty = set()
+        self.shared = set()
+        self.pending = {}
+        self._pending_lock = threading.Lock()
+        self.known_ids = self._scan_shards()
+        self.stats = defaultdict(int)
+
+    def _scan_shards(self) -> set:
+        """Find group ids that have a shard file"""
+        if not os.path.isdir(self.shard_dir):
+            return set()
+
+        known = set()
+        for name in os.listdir(self.shard_dir):
+            match = self.SHARD_PATTERN.match(name)
+            if match:
+                known.add(int(match.group(1)))
+        return known
+
+    def _path(self, group_id: int) -> str:
+        """Shard file path for a group"""
+        return os.path.join(self.shard_dir, f"group_{group_id}.pkl")
+
+    # ==================== ACCESS ====================
+
+    def get(self, group_id: int, create: bool = False) -> Optional[OrderedDict]:
+        """Get a group's knowledge, loading its shard if needed"""
+        shard = self.resident.get(group_id)
+        if shard is not None:
+            self.resident.move_to_end(group_id)
+            self.stats['hits'] += 1
+            return shard
+
+        if group_id in self.known_ids:
+            shard = self._load(group_id)
+            self.stats['loads'] += 1
+        elif create:
+            shard = OrderedDict()
+            self.known_ids.add(group_id)
+            self.dirty.add(group_id)
+        else:
+            return None
+
+        self.resident[group_id] = shard
+        self._evict()
+        return shard
+
+    def get_writable(self, group_id: int) -> OrderedDict:
+        """Get (or create) a group's knowledge for modification, marking it dirty"""
+        shard = self.get(group_id, create=True)
+        if group_id in self.shared:
+            self.shared.discard(group_id)
+            # Entry lists are replaced, never mutated, so a shallow copy suffices
+            shard = self.resident[group_id] = OrderedDict(shard)
+        self.dirty.add(group_id)
+        return shard
+
+    def iter_shards(self) -> Iterator[Tuple[int, OrderedDict]]:
+        """Iterate over every group's knowledge without changing residency"""
+        for group_id in sorted(self.known_ids):
+            shard = self.resident.get(group_id)
+            yield group_id, shard if shard is not None else self._load(group_id)
+
+    def put(self, group_id: int, shard: OrderedDict):
+        """Replace a group's knowledge"""
+        self.resident[group_id] = shard
+        self.resident.move_to_end(group_id)
+        self.known_ids.add(group_id)
+        self.dirty.add(group_id)
+        self.shared.discard(group_id)
+        self._evict()
+
+    def mark_dirty(self, group_id: int):
+        """Mark a resident shard as changed since the last save"""
+        self.dirty.add(group_id)
+
+    def _load(self, group_id: int) -> OrderedDict:
+        """Load a shard from the write-back buffer or its file"""
+        with self._pending_lock:
+            data = self.pending.get(group_id)
+
+        try:
+            if isinstance(data, bytes):
+                return pickle.loads(data)
+            if data is not None:
+                # Still shared with a snapshot being written
+                self.shared.add(group_id)
+                return data
+            with open(self._path(group_id), 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Error loading group shard {group_id}: {e}")
+            return OrderedDict()
+
+    def _evict(self):
+        """Unload least recently used shards over the resident budget"""
+        while len(self.resident) > self.max_resident:
+            group_id, shard = self.resident.popitem(last=False)
+            self.shared.discard(group_id)
+            if group_id in self.dirty:
+                self.dirty.discard(group_id)
+                with self._pending_lock:
+                    self.pending[group_id] = pickle.dumps(shard, protocol=pickle.HIGHEST_PROTOCOL)
+            self.stats['evictions'] += 1
+
+    # ==================== PERSISTENCE ====================
+
+    def snapshot(self, group_ids: Iterable[int] = None) -> Dict[int, object]:
+        """Collect changed shards (or only the given groups) for writing
+        
+        Resident shards are returned as shared objects, evicted ones as
+        the serialized bytes from the write-back buffer.
+        """
+        with self._pending_lock:
+            ids = set(self.dirty) if group_ids is None else set(group_ids)
+            for group_id in ids & self.dirty:
+                # Dirty shards are always resident; eviction moves them to pending
+                self.pending[group_id] = self.resident[group_id]
+                self.shared.add(group_id)
+                self.dirty.discard(group_id)
+
+            if group_ids is None:
+                return dict(self.pending)
+            return {group_id: self.pending[group_id] for group_id in ids if group_id in self.pending}
+
+    def write(self, snapshot: Dict[int, object]) -> bool:
+        """Serialize and write snapshotted shards to disk"""
+        try:
+            os.makedirs(self.shard_dir, exist_ok=True)
+            for group_id, shard in snapshot.items():
+                data = shard if isinstance(shard, bytes) else pickle.dumps(shard, protocol=pickle.HIGHEST_PROTOCOL)
+                path = self._path(group_id)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+
+                with self._pending_lock:
+                    if self.pending.get(group_id) is shard:
+                        del self.pending[group_id]
+            return True
+        except Exception as e:
+            print(f"Error saving group shards: {e}")
+            return False
+
+    def replace(self, shards: Dict[int, OrderedDict]) -> bool:
+        """Replace every group's knowledge with the given shards
+
+        The new shards are written first; shard files of other groups are
+        deleted only after that succeeds. On a write error the store is
+        left as it was and False is returned.
+        """
+        if not self.write(shards):
+            return False
+
+        stale = self._scan_shards() - set(shards)
+        self.resident.clear()
+        self.dirty.clear()
+        self.shared.clear()
+        with self._pending_lock:
+            self.pending.clear()
+        self.known_ids = set(shards)
+
+        for group_id in stale:
+            try:
+                os.remove(self._path(group_id))
+            except FileNotFoundError:
+                pass
+        return True
+
+    def get_stats(self) -> Dict:
+        """Get shard statistics"""
+        return {
+            **self.stats,
+            'resident': len(self.resident),
+            'known': len(self.known_ids),
+            'dirty': len(self.dirty),
+            'pending_writes': len(self.pending),
+        }
@@ -2,40 +2,127 @@
 Self-Learning AI System
 """
 
+import heapq
 import pickle
-import re
 import random
 import time
 import os
-from collections import defaultdict, Counter
+import zlib
+from collections import OrderedDict, defaultdict, Counter
+from operator import itemgetter
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Union
 import numpy as np
 
+from modules.ai_cache import ResponseCache
+from modules.ai_context import ConversationBuffer
+from modules.ai_decay import DecayTable
+from modules.ai_shards import GroupShardStore
+from modules.ai_tokenizer import Tokenizer
+from utils.helpers import deep_sizeof
+
+class PatternEntry(dict):
+    """Pattern record ordered by (weight, timestamp) so buckets can be min-heaps"""
+    
+    __slots__ = ()
+    
+    def __lt__(self, other):
+        return (self['weight'], self['timestamp']) < (other['weight'], other['timestamp'])
+
+class KnowledgeSnapshot:
+    """Point-in-time view of the global knowledge sections
+    
+    Sections are shallow copies taken between two AI jobs. Writers never
+    mutate a value a snapshot may share (they copy it first), so a
+    snapshot can be read or pickled from any thread while learning
+    continues. Treat it as read-only.
+    """
+    
+    __slots__ = ('generation', 'created_at', 'knowledge')
+    
+    def __init__(self, generation: int, knowledge: Dict):
+        self.generation = generation
+        self.created_at = time.time()
+        self.knowledge = knowledge
+    
+    def __getitem__(self, section: str):
+        return self.knowledge[section]
+
 class SelfLearningAI:
     """Advanced Self-Learning AI System"""
     
-    def __init__(self, data_path="data/ai_knowledge.pkl"):
+    def __init__(self, data_path="data/ai_knowledge.pkl", config: Dict = None):
         self.data_path = data_path
+        self.config = config or {}
+        self.max_patterns_per_key = self.config.get('max_patterns_per_key', 10)
+        self.pattern_max_age = self.config.get('pattern_max_age', 2592000)  # 30 days
+        self.prune_budget = self.config.get('prune_budget', 256)
+        self.memory_size = self.config.get('memory_size', 1000)
+        self.max_entries_per_input = self.config.get('max_entries_per_input', 5)
+        self.phrase_hash_buckets = self.config.get('phrase_hash_buckets', 0)
+        self.context_window = self.config.get('context_window', 300)
+        self.context_boost = self.config.get('context_boost', 1.3)
+        self.memory_budgets = {
+            'user_profiles': 5000,
+            'group_knowledge': 500,
+            'responses': 20000,
+            'word_weights': 50000,
+            **self.config.get('memory_budgets', {}),
+        }
+        self.tokenizer = Tokenizer(self.config.get('intent_lexicons'))
+        self.decay = DecayTable(
+            bucket_seconds=self.config.get('decay_bucket_seconds', 3600),
+            half_life=self.config.get('decay_half_life', 604800),
+            fresh_boost=self.config.get('decay_fresh_boost', 1.5),
+            stale_floor=self.config.get('decay_stale_floor', 0.5),
+            horizon=self.pattern_max_age,
+            refresh_interval=self.config.get('decay_refresh_interval', 60),
+        )
+        self.response_cache = ResponseCache(self.config.get('response_cache_size', 2048))
+        self.groups = GroupShardStore(
+            self.config.get('group_shard_dir') or os.path.join(os.path.dirname(data_path), 'ai_groups'),
+            self.memory_budgets['group_knowledge']
+        )
         self.knowledge = self._load_knowledge()
-        self.session_memory = defaultdict(list)
+        self.generation = 0  # bumped by every snapshot
+        self._owned_profiles = None  # profiles copied since the latest snapshot
+        self.context = ConversationBuffer(
+            size=self.config.get('context_size', 8),
+            idle_seconds=self.config.get('context_idle_seconds', 3600),
+            max_chats=self.config.get('context_max_chats', 10000),
+        )
         
     def _load_knowledge(self):
         """Load AI knowledge from file"""
         if os.path.exists(self.data_path):
             try:
                 with open(self.data_path, 'rb') as f:
-                    return pickle.load(f)
+                    knowledge = pickle.load(f)
+                if 'age_index' not in knowledge or len(next(iter(knowledge['age_index']), ())) == 2:
+                    self._migrate_patterns(knowledge)
+                if not isinstance(knowledge['user_profiles'], OrderedDict):
+                    self._migrate_sections(knowledge)
+                if knowledge['stats'].get('decay_bucket_seconds') != self.decay.bucket_seconds:
+                    self._rebucket_patterns(knowledge)
+                
+                # Group knowledge from older files moves into shard files
+                for group_id, group_data in knowledge.pop('group_knowledge', {}).items():
+                    self.groups.put(group_id, group_data)
+                return knowledge
             except Exception as e:
                 print(f"Error loading AI knowledge: {e}")
         
-        # Initialize new knowledge base
+        return self._empty_knowledge()
+    
+    def _empty_knowledge(self) -> Dict:
+        """Initialize new knowledge base"""
         return {
             'patterns': defaultdict(list),
-            'responses': defaultdict(list),
+            'responses': OrderedDict(),
             'contexts': defaultdict(dict),
-            'user_profiles': defaultdict(dict),
-            'group_knowledge': defaultdict(dict),
-            'word_weights': defaultdict(float),
+            'user_profiles': OrderedDict(),
+            'word_weights': OrderedDict(),
+            'age_index': [],
             'stats': {
                 'total_learned': 0,
                 'responses_given': 0,
@@ -45,128 +132,362 @@ class SelfLearningAI:
                 'knowledge_size': 0,
                 'recent_learning': 0,
                 'avg_learning': 0,
-                'optimized': False
+                'optimized': False,
+                'evictions': defaultdict(int),
+                'decay_bucket_seconds': self.decay.bucket_seconds
             }
         }
     
     def save_knowledge(self):
         """Save AI knowledge to file"""
+        snapshot = self.snapshot_knowledge()
+        saved = self.write_snapshot(snapshot)
+        self.record_save(snapshot)
+        return saved
+    
+    def snapshot(self) -> KnowledgeSnapshot:
+        """Take a copy-on-write snapshot of the global knowledge
+        
+        Only the section containers are copied; values are shared until
+        a writer touches them. Must run where writers run (the AI worker).
+        """
+        knowledge = {section: data.copy() for section, data in self.knowledge.items()}
+        knowledge['stats']['evictions'] = knowledge['stats']['evictions'].copy()
+        
+        self.generation += 1
+        self._owned_profiles = set()
+        return KnowledgeSnapshot(self.generation, knowledge)
+    
+    def snapshot_knowledge(self) -> Dict:
+        """Snapshot the global knowledge and changed group shards for saving"""
+        return {
+            'global': self.snapshot(),
+            'groups': self.groups.snapshot(),
+        }
+    
+    def write_snapshot(self, snapshot: Dict) -> bool:
+        """Serialize and write a snapshot from snapshot_knowledge() (safe off the AI worker)
+        
+        Only the snapshot is touched; the written size is left in it for
+        record_save().
+        """
         try:
+            data = pickle.dumps(snapshot['global'].knowledge, protocol=pickle.HIGHEST_PROTOCOL)
             os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
-            with open(self.data_path, 'wb') as f:
-                pickle.dump(self.knowledge, f)
-            self.knowledge['stats']['knowledge_size'] = os.path.getsize(self.data_path) / 1024
-            return True
+            tmp_path = f"{self.data_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.data_path)
+            snapshot['knowledge_size'] = len(data) / 1024
         except Exception as e:
             print(f"Error saving AI knowledge: {e}")
             return False
+        
+        return self.groups.write(snapshot['groups'])
+    
+    def record_save(self, snapshot: Dict):
+        """Copy the size of a written snapshot into the live stats (on the AI worker)"""
+        if 'knowledge_size' in snapshot:
+            self.knowledge['stats']['knowledge_size'] = snapshot['knowledge_size']
+    
+    def save_group(self, group_id: int) -> bool:
+        """Save a single group's shard"""
+        return self.groups.write(self.groups.snapshot([group_id]))
     
     def learn(self, input_text: str, response: str, user_id: int = None, group_id: int = None):
         """Learn from input and response"""
-        input_text = input_text.lower().strip()
-        response = response.strip()
-        
-        if not input_text or not response:
+        features = self.extract_features(input_text, response)
+        if features is None:
             return
         
-        # Extract features
-        words = self._extract_words(input_text)
-        phrases = self._extract_phrases(input_text)
-        intent = self._detect_intent(input_text)
+        input_text, response, words, phrases, intent = features
+        self._store_pair(input_text, response, user_id, group_id, time.time(), words, phrases, intent)
+        
+        # Update statistics
+        self.knowledge['stats']['total_learned'] += 1
+        self.knowledge['stats']['patterns_stored'] = len(self.knowledge['patterns'])
+        self.knowledge['stats']['recent_learning'] += 1
+        
+        # Drop cached responses that read any key touched above
+        self.response_cache.invalidate([input_text, *words, *map(self._phrase_key, phrases)])
+    
+    def learn_bulk(self, pairs: List[tuple]) -> int:
+        """Merge pre-tokenized pairs into the knowledge base in one pass
+        
+        Each pair is (input_text, response, user_id, group_id, timestamp,
+        words, phrases, intent), as built from extract_features().
+        Pattern entries are grouped by key and merged into each key's heap
+        once; statistics and the response cache are updated once per batch.
+        """
+        new_patterns = defaultdict(list)
+        for input_text, response, user_id, group_id, timestamp, words, phrases, intent in pairs:
+            self._store_pair(input_text, response, user_id, group_id, timestamp, words, phrases, intent,
+                             new_patterns)
+        for key, entries in new_patterns.items():
+            self._merge_patterns(key, entries)
+        
+        if pairs:
+            self.knowledge['stats']['total_learned'] += len(pairs)
+            self.knowledge['stats']['patterns_stored'] = len(self.knowledge['patterns'])
+            self.knowledge['stats']['recent_learning'] += len(pairs)
+            self.response_cache.clear()
+        
+        return len(pairs)
+    
+    def extract_features(self, input_text: str, response: str) -> Optional[tuple]:
+        """Normalize a pair and tokenize its input, or None if either side is empty"""
+        return self.tokenizer.features(input_text, response)
+    
+    def _store_pair(self, input_text: str, response: str, user_id: int, group_id: int,
+                    timestamp: float, words: List[str], phrases: List[str], intent: str,
+                    new_patterns: Dict[object, list] = None):
+        """Store one tokenized pair in every knowledge section
         
-        # Store in knowledge base
-        timestamp = time.time()
+        With `new_patterns`, pattern entries are collected there by key
+        for _merge_patterns instead of being pushed one at a time.
+        """
+        bucket = self.decay.bucket_of(timestamp)
+        if new_patterns is None:
+            push = self._push_pattern
+        else:
+            push = lambda key, entry: new_patterns[key].append(entry)
         
         # Store by words
         for word in words:
             if len(word) > 2:  # Ignore short words
-                self.knowledge['patterns'][word].append({
-                    'input': input_text,
-                    'response': response,
-                    'timestamp': timestamp,
-                    'weight': 1.0,
-                    'user_id': user_id,
-                    'group_id': group_id,
-                    'intent': intent
-                })
-        
-        # Store by phrases
+                push(word, PatternEntry(
+                    input=input_text,
+                    response=response,
+                    timestamp=timestamp,
+                    bucket=bucket,
+                    weight=1.0,
+                    user_id=user_id,
+                    group_id=group_id,
+                    intent=intent
+                ))
+        
+        # Store by phrases (hashed into integer keys when enabled)
         for phrase in phrases:
-            self.knowledge['patterns'][phrase].append({
-                'input': input_text,
-                'response': response,
-                'timestamp': timestamp,
-                'weight': 1.5,  # Phrases have higher weight
-                'user_id': user_id,
-                'group_id': group_id,
-                'intent': intent
-            })
+            push(self._phrase_key(phrase), PatternEntry(
+                input=input_text,
+                response=response,
+                timestamp=timestamp,
+                bucket=bucket,
+                weight=1.5,  # Phrases have higher weight
+                user_id=user_id,
+                group_id=group_id,
+                intent=intent
+            ))
         
         # Store in responses
-        self.knowledge['responses'][response].append({
+        responses = self.knowledge['responses']
+        self._append_recent(responses, response, {
             'input': input_text,
             'timestamp': timestamp,
             'user_id': user_id,
             'group_id': group_id
         })
+        self._enforce_budget('responses', responses)
         
         # User-specific learning
         if user_id:
-            if user_id not in self.knowledge['user_profiles']:
-                self.knowledge['user_profiles'][user_id] = {
-                    'patterns': defaultdict(list),
+            profiles = self.knowledge['user_profiles']
+            user_data = profiles.get(user_id)
+            if user_data is None:
+                user_data = profiles[user_id] = {
+                    'patterns': OrderedDict(),
                     'preferences': defaultdict(float),
                     'learning_count': 0,
                     'last_learned': timestamp
                 }
                 self.knowledge['stats']['users_learned'] += 1
+            else:
+                profiles.move_to_end(user_id)
+            user_data = self._writable_profile(user_id, user_data)
             
-            user_data = self.knowledge['user_profiles'][user_id]
-            user_data['patterns'][input_text].append({
+            self._append_recent(user_data['patterns'], input_text, {
                 'response': response,
                 'count': 1,
                 'last_used': timestamp
             })
             user_data['learning_count'] += 1
             user_data['last_learned'] = timestamp
+            self._enforce_inputs(user_data['patterns'])
+            self._enforce_budget('user_profiles', profiles)
         
-        # Group-specific learning
+        # Group-specific learning (stored in the group's shard, marked dirty)
         if group_id:
-            if group_id not in self.knowledge['group_knowledge']:
-                self.knowledge['group_knowledge'][group_id] = defaultdict(list)
-            
-            self.knowledge['group_knowledge'][group_id][input_text].append({
+            group_data = self.groups.get_writable(group_id)
+            self._append_recent(group_data, input_text, {
                 'response': response,
                 'user_id': user_id,
                 'timestamp': timestamp
             })
+            self._enforce_inputs(group_data)
         
-        # Update statistics
-        self.knowledge['stats']['total_learned'] += 1
-        self.knowledge['stats']['patterns_stored'] = len(self.knowledge['patterns'])
-        self.knowledge['stats']['recent_learning'] += 1
-        
-        # Update word weights
+        # Update word weights (re-inserting keeps the dict in LRU order)
+        word_weights = self.knowledge['word_weights']
         for word in words:
-            self.knowledge['word_weights'][word] = min(
-                self.knowledge['word_weights'].get(word, 0) + 0.1, 2.0
-            )
+            word_weights[word] = min(word_weights.pop(word, 0) + 0.1, 2.0)
+        self._enforce_budget('word_weights', word_weights)
+    
+    def _append_recent(self, section: OrderedDict, key, entry: Dict):
+        """Append an entry under key, keeping the last few and marking key as recently used"""
+        # A new list, since snapshots may share the old one
+        entries = [*section.pop(key, ()), entry]
+        if len(entries) > self.max_entries_per_input:
+            del entries[0]
+        section[key] = entries
+    
+    def _writable_profile(self, user_id: int, user_data: Dict) -> Dict:
+        """Copy a user profile shared with the latest snapshot before it is modified"""
+        owned = self._owned_profiles
+        if owned is None or user_id in owned:
+            return user_data
+        
+        owned.add(user_id)
+        user_data = {**user_data, 'patterns': OrderedDict(user_data['patterns'])}
+        self.knowledge['user_profiles'][user_id] = user_data
+        return user_data
+    
+    def _enforce_inputs(self, patterns: OrderedDict):
+        """Cap remembered inputs of a user or group at memory_size"""
+        while len(patterns) > self.memory_size:
+            old_input, _ = patterns.popitem(last=False)
+            self.response_cache.invalidate([old_input])
+    
+    def _enforce_budget(self, section: str, data: OrderedDict):
+        """Evict least recently used entries of a section over its budget"""
+        budget = self.memory_budgets[section]
+        while len(data) > budget:
+            _, evicted = data.popitem(last=False)
+            self.knowledge['stats']['evictions'][section] += 1
+            
+            # Lookups read user patterns by input text
+            if section == 'user_profiles':
+                self.response_cache.invalidate(evicted['patterns'].keys())
+    
+    def _phrase_key(self, phrase: str):
+        """Storage key for a phrase: the phrase itself, or its hash bucket
+        
+        crc32 is stable across processes (unlike hash()), so hashed keys
+        stay valid in saved knowledge files.
+        """
+        if not self.phrase_hash_buckets:
+            return phrase
+        return zlib.crc32(phrase.encode('utf-8')) % self.phrase_hash_buckets
+    
+    def _exact_patterns(self, input_text: str) -> Optional[List[PatternEntry]]:
+        """Patterns stored under the input itself (a word or phrase key)"""
+        patterns = self.knowledge['patterns']
+        if not self.phrase_hash_buckets or not 2 <= len(input_text.split()) <= 3:
+            return patterns.get(input_text)
+        
+        bucket = patterns.get(self._phrase_key(input_text))
+        if not bucket:
+            return None
+        
+        # Colliding phrases share a bucket; keep patterns whose input contains this phrase
+        padded = f" {input_text} "
+        return [p for p in bucket if padded in f" {p['input']} "]
+    
+    @staticmethod
+    def _age_entry(timestamp: float, key) -> tuple:
+        """Age index entry; the type flag keeps str and hashed int keys from being compared"""
+        return (timestamp, isinstance(key, int), key)
+    
+    def _push_pattern(self, key, entry: PatternEntry):
+        """Add a pattern to its key's bounded top-k heap"""
+        patterns = self.knowledge['patterns']
+        bucket = patterns.get(key)
+        if bucket is None:
+            bucket = []
+            heapq.heappush(self.knowledge['age_index'], self._age_entry(entry['timestamp'], key))
+        else:
+            bucket = list(bucket)  # copy on write: snapshots may share the old heap
+        
+        # Keep only the top patterns per key, evicting the weakest/oldest
+        heapq.heappush(bucket, entry)
+        if len(bucket) > self.max_patterns_per_key:
+            heapq.heappop(bucket)
+        patterns[key] = bucket
+    
+    def _merge_patterns(self, key, entries: List[PatternEntry]):
+        """Add many patterns to a key's top-k heap with a single rebuild"""
+        patterns = self.knowledge['patterns']
+        bucket = patterns.get(key)
+        if bucket is None:
+            oldest = entries[0]['timestamp'] if len(entries) == 1 else min(entry['timestamp'] for entry in entries)
+            heapq.heappush(self.knowledge['age_index'], self._age_entry(oldest, key))
+            bucket = entries
+        else:
+            bucket = [*bucket, *entries]  # a new list: snapshots may share the old heap
         
-        # Auto-optimize if needed
-        if self.knowledge['stats']['total_learned'] % 100 == 0:
-            self._optimize_knowledge()
+        if len(bucket) > self.max_patterns_per_key:
+            bucket = heapq.nlargest(self.max_patterns_per_key, bucket, key=itemgetter('weight', 'timestamp'))
+        if len(bucket) > 1:
+            heapq.heapify(bucket)
+        patterns[key] = bucket
     
-    def generate_response(self, input_text: str, user_id: int = None, group_id: int = None) -> str:
-        """Generate response based on learned knowledge"""
+    def generate_response(self, input_text: str, user_id: int = None, group_id: int = None,
+                          context: str = None) -> str:
+        """Generate response based on learned knowledge
+        
+        `context` is the chat's message before this one (see
+        preceding_message); fuzzy matches on its topic are boosted.
+        """
         input_text = input_text.lower().strip()
+        cache_key = (input_text, user_id, group_id)
+        
+        # Cached rankings depend on pattern age; drop them when the decay bucket moves
+        if self.decay.maybe_refresh():
+            self.response_cache.clear()
+        
+        # The cache holds the context-free match; the context boost is applied on top
+        match = self.response_cache.get(cache_key)
+        if match is None:
+            match = self._match_response(input_text, user_id, group_id)
+            # The lookup only reads the exact key and the input's word keys
+            tokens = [input_text, self._phrase_key(input_text), *self._extract_words(input_text)]
+            self.response_cache.put(cache_key, tokens, match)
+        response = self._pick_response(match, input_text, context)
+        
+        if response is not None:
+            self.knowledge['stats']['responses_given'] += 1
+            return response
+        
+        # Default responses if nothing matches (never cached)
+        default_responses = [
+            "Interesting! Can you tell me more?",
+            "I'm still learning. Could you explain that differently?",
+            "That's something new! I'll remember that.",
+            "হুঁ, বুঝলাম! আরো কিছু বলুন।",
+            "আপনি কি বলতে চাচ্ছেন?",
+            "এটা তো নতুন শিখলাম! ধন্যবাদ।",
+            "আমি এখনো শিখছি, একটু সহজ করে বলুন।",
+            "মজার বিষয়! আরো জানতে চাই।"
+        ]
+        
+        self.knowledge['stats']['responses_given'] += 1
+        return random.choice(default_responses)
+    
+    def _lookup_response(self, input_text: str, user_id: int = None, group_id: int = None,
+                         context: str = None) -> Optional[str]:
+        """Find the best learned response, or None if nothing matches"""
+        return self._pick_response(self._match_response(input_text, user_id, group_id), input_text, context)
+    
+    def _match_response(self, input_text: str, user_id: int = None, group_id: int = None) -> Union[str, tuple]:
+        """A direct response, else the scored fuzzy candidates
         
+        Candidates are (response, weight, pattern words beyond the input)
+        tuples; nothing here depends on conversation context, so the
+        result can be cached per input.
+        """
         # Check exact matches first
-        if input_text in self.knowledge['patterns']:
-            responses = self.knowledge['patterns'][input_text]
-            if responses:
-                latest = max(responses, key=lambda x: x['timestamp'])
-                self.knowledge['stats']['responses_given'] += 1
-                return latest['response']
+        responses = self._exact_patterns(input_text)
+        if responses:
+            latest = max(responses, key=lambda x: x['timestamp'])
+            return latest['response']
         
         # Check user-specific responses
         if user_id and user_id in self.knowledge['user_profiles']:
@@ -175,22 +496,21 @@ class SelfLearningAI:
                 user_responses = user_patterns[input_text]
                 if user_responses:
                     best = max(user_responses, key=lambda x: x['count'])
-                    self.knowledge['stats']['responses_given'] += 1
                     return best['response']
         
         # Check group-specific responses
-        if group_id and group_id in self.knowledge['group_knowledge']:
-            group_patterns = self.knowledge['group_knowledge'][group_id]
+        group_patterns = self.groups.get(group_id) if group_id else None
+        if group_patterns:
             if input_text in group_patterns:
                 group_responses = group_patterns[input_text]
                 if group_responses:
                     latest = max(group_responses, key=lambda x: x['timestamp'])
-                    self.knowledge['stats']['responses_given'] += 1
                     return latest['response']
         
         # Find similar patterns using word matching
         input_words = set(self._extract_words(input_text))
-        possible_responses = []
+        candidates = []
+        decay = self.decay.multiplier
         
         for word in input_words:
             if word in self.knowledge['patterns']:
@@ -204,10 +524,8 @@ class SelfLearningAI:
                         weight = pattern['weight']
                         weight *= similarity
                         
-                        # Adjust for recency
-                        recency = (time.time() - pattern['timestamp']) / 86400
-                        if recency < 7:  # Recent patterns
-                            weight *= 1.5
+                        # Adjust for recency (precomputed exponential decay)
+                        weight *= decay(pattern['bucket'])
                         
                         # Adjust for user/group relevance
                         if user_id and pattern['user_id'] == user_id:
@@ -215,112 +533,169 @@ class SelfLearningAI:
                         if group_id and pattern['group_id'] == group_id:
                             weight *= 1.5
                         
-                        possible_responses.append((pattern['response'], weight))
+                        candidates.append((pattern['response'], weight, frozenset(pattern_words - input_words)))
         
-        if possible_responses:
-            # Remove duplicates and sum weights
-            response_weights = defaultdict(float)
-            for response, weight in possible_responses:
-                response_weights[response] += weight
-            
-            # Select response with highest weight
-            if response_weights:
-                best_response = max(response_weights.items(), key=lambda x: x[1])
-                if best_response[1] > 0.5:  # Confidence threshold
-                    self.knowledge['stats']['responses_given'] += 1
-                    return best_response[0]
-        
-        # Default responses if nothing matches
-        default_responses = [
-            "Interesting! Can you tell me more?",
-            "I'm still learning. Could you explain that differently?",
-            "That's something new! I'll remember that.",
-            "হুঁ, বুঝলাম! আরো কিছু বলুন।",
-            "আপনি কি বলতে চাচ্ছেন?",
-            "এটা তো নতুন শিখলাম! ধন্যবাদ।",
-            "আমি এখনো শিখছি, একটু সহজ করে বলুন।",
-            "মজার বিষয়! আরো জানতে চাই।"
-        ]
+        return tuple(candidates)
+    
+    def _pick_response(self, match: Union[str, tuple], input_text: str, context: str = None) -> Optional[str]:
+        """Resolve a _match_response result, boosting candidates on the context's topic"""
+        if isinstance(match, str) or not match:
+            return match or None
         
-        self.knowledge['stats']['responses_given'] += 1
-        return random.choice(default_responses)
+        # Words the preceding message adds beyond the input
+        context_words = set(self._extract_words(context)) - set(self._extract_words(input_text)) if context else None
+        
+        # Remove duplicates and sum weights
+        response_weights = defaultdict(float)
+        for response, weight, pattern_words in match:
+            if context_words and not context_words.isdisjoint(pattern_words):
+                weight *= self.context_boost
+            response_weights[response] += weight
+        
+        # Select response with highest weight
+        best_response = max(response_weights.items(), key=lambda x: x[1])
+        if best_response[1] > 0.5:  # Confidence threshold
+            return best_response[0]
+        return None
     
     def _extract_words(self, text: str) -> List[str]:
         """Extract words from text"""
-        # Bengali and English words
-        words = re.findall(r'[\u0980-\u09FF]+|[a-zA-Z]+', text.lower())
-        return [w for w in words if len(w) > 1]
-    
-    def _extract_phrases(self, text: str) -> List[str]:
-        """Extract key phrases from text"""
-        words = text.split()
-        phrases = []
-        
-        # Create 2-3 word phrases
-        for i in range(len(words) - 1):
-            # 2-word phrases
-            phrase2 = ' '.join(words[i:i+2])
-            if len(phrase2) > 3:
-                phrases.append(phrase2)
+        return self.tokenizer.words(text)
+    
+    def prune_step(self, budget: int = None) -> int:
+        """Expire old patterns, visiting at most `budget` keys
+        
+        The age index is a min-heap holding one (oldest timestamp, key)
+        entry per key (see _age_entry), so each call only touches keys that may have
+        expired patterns and never sweeps the whole knowledge base.
+        """
+        budget = budget or self.prune_budget
+        cutoff = time.time() - self.pattern_max_age
+        patterns = self.knowledge['patterns']
+        age_index = self.knowledge['age_index']
+        
+        processed = 0
+        pruned = []
+        while age_index and processed < budget and age_index[0][0] < cutoff:
+            _, _, key = heapq.heappop(age_index)
+            processed += 1
+            
+            bucket = patterns.get(key)
+            if not bucket:
+                patterns.pop(key, None)
+                continue
             
-            # 3-word phrases
-            if i < len(words) - 2:
-                phrase3 = ' '.join(words[i:i+3])
-                if len(phrase3) > 5:
-                    phrases.append(phrase3)
-        
-        return phrases
-    
-    def _detect_intent(self, text: str) -> str:
-        """Detect intent from text"""
-        text_lower = text.lower()
-        
-        # Question intent
-        question_words = ['what', 'where', 'when', 'why', 'how', 'who', 'which', 'কি', 'কোন', 'কখন', 'কোথায়', 'কেন', 'কীভাবে']
-        if any(word in text_lower for word in question_words) or text_lower.endswith('?'):
-            return 'question'
-        
-        # Greeting intent
-        greeting_words = ['hello', 'hi', 'hey', 'hola', 'নমস্কার', 'সালাম', 'হ্যালো', 'হাই']
-        if any(word in text_lower for word in greeting_words):
-            return 'greeting'
-        
-        # Thanks intent
-        thanks_words = ['thanks', 'thank', 'ধন্যবাদ', 'শুকরিয়া']
-        if any(word in text_lower for word in thanks_words):
-            return 'thanks'
-        
-        # Farewell intent
-        farewell_words = ['bye', 'goodbye', 'বিদায়', 'খোদা হাফেজ']
-        if any(word in text_lower for word in farewell_words):
-            return 'farewell'
-        
-        return 'general'
-    
-    def _optimize_knowledge(self):
-        """Optimize knowledge base by removing old/duplicate patterns"""
-        current_time = time.time()
-        
-        for word, patterns in list(self.knowledge['patterns'].items()):
-            # Remove patterns older than 30 days
-            patterns = [p for p in patterns if current_time - p['timestamp'] < 2592000]
+            fresh = [p for p in bucket if p['timestamp'] >= cutoff]
+            if len(fresh) != len(bucket):
+                pruned.append(key)
             
-            # Keep only top 10 patterns per word
-            if len(patterns) > 10:
-                patterns.sort(key=lambda x: x['weight'], reverse=True)
-                patterns = patterns[:10]
+            if fresh:
+                heapq.heapify(fresh)
+                patterns[key] = fresh
+                heapq.heappush(age_index, self._age_entry(min(p['timestamp'] for p in fresh), key))
+            else:
+                del patterns[key]
+        
+        if pruned:
+            self.response_cache.invalidate(pruned)
+            self.knowledge['stats']['patterns_stored'] = len(patterns)
+            self.knowledge['stats']['optimized'] = True
+        
+        return processed
+    
+    def _migrate_patterns(self, knowledge: Dict):
+        """Convert pattern lists from older knowledge files into bounded heaps"""
+        age_index = []
+        for key, bucket in list(knowledge['patterns'].items()):
+            if not bucket:
+                del knowledge['patterns'][key]
+                continue
             
-            self.knowledge['patterns'][word] = patterns
+            entries = [PatternEntry(p) for p in bucket]
+            entries = heapq.nlargest(self.max_patterns_per_key, entries)
+            heapq.heapify(entries)
+            knowledge['patterns'][key] = entries
+            age_index.append(self._age_entry(min(p['timestamp'] for p in entries), key))
         
-        self.knowledge['stats']['optimized'] = True
+        heapq.heapify(age_index)
+        knowledge['age_index'] = age_index
+    
+    def _rebucket_patterns(self, knowledge: Dict):
+        """Assign decay buckets to patterns from older files or a changed bucket width"""
+        bucket_of = self.decay.bucket_of
+        for bucket in knowledge['patterns'].values():
+            for pattern in bucket:
+                pattern['bucket'] = bucket_of(pattern['timestamp'])
+        knowledge['stats']['decay_bucket_seconds'] = self.decay.bucket_seconds
+    
+    def _migrate_sections(self, knowledge: Dict):
+        """Convert unbounded sections from older knowledge files into LRU order"""
+        def last_seen(entries):
+            return max((e.get('timestamp', e.get('last_used', 0)) for e in entries), default=0)
+        
+        def recent(section):
+            items = sorted(section.items(), key=lambda item: last_seen(item[1]))
+            return OrderedDict((key, entries[-self.max_entries_per_input:]) for key, entries in items)
+        
+        profiles = sorted(knowledge['user_profiles'].items(), key=lambda item: item[1].get('last_learned', 0))
+        knowledge['user_profiles'] = OrderedDict()
+        for user_id, user_data in profiles:
+            user_data['patterns'] = recent(user_data['patterns'])
+            self._enforce_inputs(user_data['patterns'])
+            knowledge['user_profiles'][user_id] = user_data
+        
+        groups = sorted(
+            knowledge.get('group_knowledge', {}).items(),
+            key=lambda item: max((last_seen(entries) for entries in item[1].values()), default=0)
+        )
+        knowledge['group_knowledge'] = OrderedDict()
+        for group_id, group_data in groups:
+            group_data = recent(group_data)
+            self._enforce_inputs(group_data)
+            knowledge['group_knowledge'][group_id] = group_data
+        
+        knowledge['responses'] = recent(knowledge['responses'])
+        knowledge['word_weights'] = OrderedDict(knowledge['word_weights'])
+        knowledge['stats'].setdefault('evictions', defaultdict(int))
+        
+        for section in ('user_profiles', 'responses', 'word_weights'):
+            data = knowledge[section]
+            while len(data) > self.memory_budgets[section]:
+                data.popitem(last=False)
+    
+    def memory_usage(self) -> Dict[str, int]:
+        """Approximate bytes held by each knowledge section"""
+        usage = {
+            section: deep_sizeof(self.knowledge[section])
+            for section in ('patterns', 'age_index', 'user_profiles', 'responses', 'word_weights')
+        }
+        usage['group_knowledge'] = deep_sizeof(self.groups.resident)
+        usage['response_cache'] = deep_sizeof(self.response_cache.entries)
+        usage['total'] = sum(usage.values())
+        return usage
     
     def get_stats(self):
         """Get AI statistics"""
         return self.knowledge['stats']
     
+    def get_cache_stats(self) -> Dict:
+        """Get response cache statistics"""
+        return self.response_cache.get_stats()
+    
+    def record_message(self, chat_id: int, user_id: int, text: str):
+        """Remember a chat message as context for later responses"""
+        self.context.record(chat_id, user_id, text)
+    
+    def preceding_message(self, chat_id: int) -> Optional[str]:
+        """The chat's latest recorded message, if recent enough to be context
+        
+        Call it before recording the message it is context for.
+        """
+        return self.context.latest(chat_id, self.context_window)
+    
     def clear_memory(self):
-        """Clear session memory"""
-        self.session_memory.clear()
+        """Clear conversation context"""
+        self.context.clear()
     
     def get_user_profile(self, user_id: int) -> Dict:
         """Get user learning profile"""
@@ -330,6 +705,12 @@ class SelfLearningAI:
     
     def get_group_knowledge(self, group_id: int) -> Dict:
         """Get group-specific knowledge"""
-        if group_id in self.knowledge['group_knowledge']:
-            return self.knowledge['group_knowledge'][group_id]
-        return {}
\ No newline at end of file
+        return self.groups.get(group_id) or {}
+    
+    def get_shard_stats(self) -> Dict:
+        """Get group shard statistics"""
+        return self.groups.get_stats()
+    
+    def get_context_stats(self) -> Dict:
+        """Get conversation context statistics"""
+        return self.context.get_stats()
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Compiled Tokenizer for the Self-Learning AI
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from utils.text_matcher import AhoCorasick
+
+# Intents in priority order: the first intent matched wins
+DEFAULT_INTENT_LEXICONS = {
+    'question': ['what', 'where', 'when', 'why', 'how', 'who', 'which', 'কি', 'কোন', 'কখন', 'কোথায়', 'কেন', 'কীভাবে'],
+    'greeting': ['hello', 'hi', 'hey', 'hola', 'নমস্কার', 'সালাম', 'হ্যালো', 'হাই'],
+    'thanks': ['thanks', 'thank', 'ধন্যবাদ', 'শুকরিয়া'],
+    'farewell': ['bye', 'goodbye', 'বিদায়', 'খোদা হাফেজ'],
+}
+
+class Tokenizer:
+    """Compiled tokenizer yielding words, phrases and intent
+
+    Words are runs of Bengali or Latin letters; phrases are 2-3 word
+    n-grams over whitespace-separated chunks. Intent keywords are matched
+    word by word with an Aho-Corasick automaton fed from the word stream,
+    so "hi" never matches inside "this".
+    """
+
+    WORD_RE = re.compile(r'[\u0980-\u09FF]+|[a-z]+')
+
+    def __init__(self, intent_lexicons: Dict[str, List[str]] = None):
+        lexicons = {intent: list(words) for intent, words in DEFAULT_INTENT_LEXICONS.items()}
+        for intent, words in (intent_lexicons or {}).items():
+            lexicons.setdefault(intent, []).extend(words)
+
+        self.intent_lexicons = lexicons
+        self.intent_priority = {intent: rank for rank, intent in enumerate(lexicons)}
+        self.intent_matcher = AhoCorasick(
+            (tuple(self.WORD_RE.findall(keyword.lower())), intent)
+            for intent, keywords in lexicons.items()
+            for keyword in keywords
+        )
+
+    def features(self, input_text: str, response: str) -> Optional[tuple]:
+        """Normalize a pair and tokenize its input, or None if either side is empty"""
+        input_text = input_text.lower().strip()
+        response = response.strip()
+
+        if not input_text or not response:
+            return None
+
+        words, phrases, intent = self.tokenize(input_text)
+        return input_text, response, words, phrases, intent
+
+    def tokenize(self, text: str) -> Tuple[List[str], List[str], str]:
+        """Return (words, phrases, intent) for text
+
+        The compiled word pattern yields the token stream once; words and
+        intent both come from it, and phrases reuse the C-level split.
+        """
+        text = text.lower()
+        tokens = self.WORD_RE.findall(text)
+
+        step = self.intent_matcher.step
+        outputs = self.intent_matcher.outputs
+        priority = self.intent_priority
+        state = 0
+        intent = None
+        intent_rank = len(priority)
+
+        for token in tokens:
+            state = step(state, token)
+            for _, matched in outputs[state]:
+                if priority[matched] < intent_rank:
+                    intent, intent_rank = matched, priority[matched]
+
+        if text.endswith('?') and priority['question'] < intent_rank:
+            intent = 'question'
+
+        words = [token for token in tokens if len(token) > 1]
+        return words, self._phrases(text.split()), intent or 'general'
+
+    def words(self, text: str) -> List[str]:
+        """Extract words only (Bengali and English, two letters or more)"""
+        return [w for w in self.WORD_RE.findall(text.lower()) if len(w) > 1]
+
+    @staticmethod
+    def _phrases(chunks: List[str]) -> List[str]:
+        """Create 2-3 word phrases from whitespace-separated chunks"""
+        phrases = []
+        for i in range(len(chunks) - 1):
+            # 2-word phrases
+            phrase2 = f"{chunks[i]} {chunks[i + 1]}"
+            if len(phrase2) > 3:
+                phrases.append(phrase2)
+
+            # 3-word phrases
+            if i < len(chunks) - 2:
+                phrase3 = f"{phrase2} {chunks[i + 2]}"
+                if len(phrase3) > 5:
+                    phrases.append(phrase3)
+
+        return phrases
@@ -0,0 +1,213 @@
+"""
+Offline Batch Trainer for the Self-Learning AI
+Bootstraps AI knowledge from the historical messages table
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import repeat
+from typing import Dict, List, Optional, Tuple
+
+from modules.ai_system import SelfLearningAI
+from modules.ai_tokenizer import Tokenizer
+
+def tokenize_pairs(pairs: List[Tuple], tokenizer: Tokenizer) -> List[Tuple]:
+    """Tokenize raw (input, response, user_id, group_id, timestamp) pairs
+
+    Runs inside worker processes, so it only depends on the (picklable)
+    tokenizer and returns plain tuples for learn_bulk().
+    """
+    tokenized = []
+    for input_text, response, user_id, group_id, timestamp in pairs:
+        features = tokenizer.features(input_text, response)
+        if features is None:
+            continue
+        input_text, response, words, phrases, intent = features
+        tokenized.append((input_text, response, user_id, group_id, timestamp, words, phrases, intent))
+    return tokenized
+
+def parse_timestamp(value) -> float:
+    """Convert a SQLite CURRENT_TIMESTAMP value (UTC) to epoch seconds"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        parsed = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+        return parsed.replace(tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+class BatchTrainer:
+    """Streams messages in chunks, pairs them and bulk-merges them into the AI
+
+    Consecutive messages in a chat become (input, response) pairs when they
+    come from different users within `max_gap` seconds. Progress is saved
+    to a checkpoint file together with the knowledge, so an interrupted
+    run resumes where it stopped.
+    """
+
+    def __init__(self, ai: SelfLearningAI, db_path: str = "data/bot_database.db",
+                 checkpoint_path: str = "data/ai_training_checkpoint.json",
+                 chunk_size: int = 5000, workers: int = None, max_gap: int = 300,
+                 checkpoint_every: int = 10):
+        self.ai = ai
+        self.db_path = db_path
+        self.checkpoint_path = checkpoint_path
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+        self.max_gap = max_gap
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint = self._load_checkpoint()
+
+    # ==================== CHECKPOINTS ====================
+
+    def _load_checkpoint(self) -> Dict:
+        """Load training progress from the checkpoint file"""
+        if os.path.exists(self.checkpoint_path):
+            try:
+                with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading training checkpoint: {e}")
+
+        return {'last_id': 0, 'last_by_chat': {}, 'rows_read': 0, 'pairs_learned': 0}
+
+    def _save_checkpoint(self):
+        """Save the knowledge base, then record progress up to it"""
+        self.ai.save_knowledge()
+
+        os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoint, f, ensure_ascii=False)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    # ==================== PIPELINE ====================
+
+    def _read_chunk(self, conn: sqlite3.Connection, after_id: int, since: float) -> List[Tuple]:
+        """Read the next chunk of messages by primary key"""
+        cursor = conn.execute(
+            """SELECT id, user_id, chat_id, text, timestamp FROM messages
+               WHERE id > ? AND timestamp >= ?
+               ORDER BY id LIMIT ?""",
+            (after_id, datetime.fromtimestamp(since, timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+             self.chunk_size)
+        )
+        return cursor.fetchall()
+
+    def _pair_rows(self, rows: List[Tuple]) -> List[Tuple]:
+        """Pair consecutive messages per chat, carrying state across chunks"""
+        last_by_chat = self.checkpoint['last_by_chat']
+        pairs = []
+
+        for _, user_id, chat_id, text, raw_timestamp in rows:
+            if not text or text.startswith('/'):
+                continue
+
+            timestamp = parse_timestamp(raw_timestamp)
+            key = str(chat_id)
+            previous = last_by_chat.get(key)
+
+            if previous:
+                prev_user, prev_text, prev_timestamp = previous
+                if prev_user != user_id and timestamp - prev_timestamp <= self.max_gap:
+                    group_id = chat_id if chat_id < 0 else None
+                    pairs.append((prev_text, text, prev_user, group_id, timestamp))
+
+            last_by_chat[key] = [user_id, text, timestamp]
+
+        return pairs
+
+    def _tokenize(self, pool: Optional[ProcessPoolExecutor], pairs: List[Tuple]) -> List[Tuple]:
+        """Tokenize pairs across the process pool"""
+        tokenizer = self.ai.tokenizer
+        if pool is None or len(pairs) < self.workers * 2:
+            return tokenize_pairs(pairs, tokenizer)
+
+        slice_size = -(-len(pairs) // self.workers)
+        slices = [pairs[i:i + slice_size] for i in range(0, len(pairs), slice_size)]
+        tokenized = []
+        for result in pool.map(tokenize_pairs, slices, repeat(tokenizer)):
+            tokenized.extend(result)
+        return tokenized
+
+    def run(self, max_rows: int = None) -> Dict:
+        """Train from all messages after the checkpoint"""
+        since = time.time() - self.ai.pattern_max_age  # older pairs would be pruned right away
+        started = time.perf_counter()
+        rows_read = pairs_learned = chunks = 0
+
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+
+        try:
+            while max_rows is None or rows_read < max_rows:
+                rows = self._read_chunk(conn, self.checkpoint['last_id'], since)
+                if not rows:
+                    break
+
+                pairs = self._pair_rows(rows)
+                learned = self.ai.learn_bulk(self._tokenize(pool, pairs))
+
+                rows_read += len(rows)
+                pairs_learned += learned
+                chunks += 1
+                self.checkpoint['last_id'] = rows[-1][0]
+                self.checkpoint['rows_read'] += len(rows)
+                self.checkpoint['pairs_learned'] += learned
+
+                elapsed = time.perf_counter() - started
+                print(
+                    f"🧠 Trained chunk {chunks}: {rows_read} rows, {pairs_learned} pairs "
+                    f"({rows_read / elapsed:.0f} rows/s, {pairs_learned / elapsed:.0f} pairs/s)"
+                )
+
+                if chunks % self.checkpoint_every == 0:
+                    self._save_checkpoint()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            conn.close()
+
+        if chunks:
+            self._save_checkpoint()
+
+        elapsed = time.perf_counter() - started
+        return {
+            'rows_read': rows_read,
+            'pairs_learned': pairs_learned,
+            'chunks': chunks,
+            'seconds': round(elapsed, 2),
+            'rows_per_second': round(rows_read / elapsed, 1) if elapsed else 0.0,
+            'pairs_per_second': round(pairs_learned / elapsed, 1) if elapsed else 0.0,
+            'last_id': self.checkpoint['last_id'],
+        }
+
+def main():
+    """Command line entry point (run while the bot is stopped)"""
+    parser = argparse.ArgumentParser(description="Train the AI from stored chat history")
+    parser.add_argument('--db', default="data/bot_database.db", help="SQLite database path")
+    parser.add_argument('--knowledge', default="data/ai_knowledge.pkl", help="AI knowledge file")
+    parser.add_argument('--checkpoint', default="data/ai_training_checkpoint.json", help="Checkpoint file")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="Messages per chunk")
+    parser.add_argument('--workers', type=int, default=None, help="Tokenizer processes")
+    parser.add_argument('--max-gap', type=int, default=300, help="Max seconds between paired messages")
+    parser.add_argument('--max-rows', type=int, default=None, help="Stop after this many rows")
+    args = parser.parse_args()
+
+    from config import Config
+
+    ai = SelfLearningAI(args.knowledge, Config.AI_CONFIG)
+    trainer = BatchTrainer(
+        ai, args.db, args.checkpoint,
+        chunk_size=args.chunk_size, workers=args.workers, max_gap=args.max_gap
+    )
+    result = trainer.run(max_rows=args.max_rows)
+    print(f"✅ Training finished: {json.dumps(result)}")
+
+if __name__ == "__main__":
+    main()
@@ -4,58 +4,64 @@ Moderation System for Telegram Bot
 
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from collections import defaultdict, deque
+
+from modules.moderation_filter import ContentFilter
+from modules.moderation_flood import FloodLimiter
+from modules.moderation_joins import JoinMonitor
+from modules.moderation_links import LinkFilter, extract_hosts
+from modules.moderation_sanctions import SanctionScheduler
+from modules.moderation_simhash import NearDuplicateDetector
+from modules.moderation_warnings import WarningService
 
 class ModerationSystem:
     """Advanced Moderation System"""
     
-    def __init__(self):
-        self.warnings = defaultdict(list)
-        self.muted_users = {}
+    def __init__(self, config: Dict = None, db=None):
+        self.config = config or {}
+        self.db = db
+        self.content_filter = ContentFilter(self.config.get('blacklist'))
+        self.links = LinkFilter(
+            self.config.get('links'),
+            self.config.get('blacklist', {}).get('domains', [])
+        )
+        self.warnings = WarningService(self.config, db)
+        self.muted_users = {}  # (chat_id, user_id) -> expires_at (None = permanent)
         self.banned_users = {}
-        self.flood_control = defaultdict(list)
+        self.sanctions = SanctionScheduler(self.config.get('sanction_batch_window', 1.0))
+        self.flood_control = FloodLimiter(
+            self.config.get('flood_limit', 5),
+            self.config.get('flood_window', 10)
+        )
+        self.joins = JoinMonitor(self.config.get('joins'))
+        self.near_duplicates = NearDuplicateDetector(self.config.get('near_duplicates'))
+        self.screen_stats = defaultdict(lambda: {'runs': 0, 'blocked': 0, 'total_us': 0.0})
+        self.screen_latencies = defaultdict(lambda: deque(maxlen=1024))
         
     async def add_warning(self, user_id: int, chat_id: int, reason: str, admin_id: int) -> int:
-        """Add warning to user"""
-        warning = {
-            'reason': reason,
-            'timestamp': time.time(),
-            'chat_id': chat_id,
-            'admin_id': admin_id
-        }
-        
-        self.warnings[f"{chat_id}_{user_id}"].append(warning)
-        
-        # Return total warnings
-        return len(self.warnings[f"{chat_id}_{user_id}"])
+        """Add warning to user; returns their active warnings in the chat"""
+        return await self.warnings.add(chat_id, user_id, reason, admin_id)
     
     async def check_flood(self, user_id: int, chat_id: int) -> bool:
-        """Check for message flooding"""
-        key = f"{chat_id}_{user_id}"
-        now = time.time()
-        
-        # Remove old timestamps (older than 10 seconds)
-        self.flood_control[key] = [t for t in self.flood_control[key] if now - t < 10]
-        
-        # Add current timestamp
-        self.flood_control[key].append(now)
-        
-        # Check if exceeds limit (5 messages in 10 seconds)
-        return len(self.flood_control[key]) > 5
+        """Check for message flooding (more than flood_limit messages per flood_window seconds)"""
+        return self.flood_control.hit((chat_id, user_id))
+    
+    def sweep_flood(self) -> int:
+        """Forget flood state of users who went quiet"""
+        return self.flood_control.sweep()
     
     async def check_content(self, text: str, chat_id: int) -> Tuple[bool, str]:
         """Check message content for violations"""
-        # Check for blacklisted words
-        blacklist = [
-            'spam', 'scam', 'fraud', 'hack', 'cheat',
-            'অশ্লীল', 'গালি', 'স্প্যাম', 'প্রতারণা'
-        ]
+        # Check links against blocked domains
+        reason = self._link_reason(text, chat_id)
+        if reason:
+            return False, reason
         
-        text_lower = text.lower()
-        for word in blacklist:
-            if word in text_lower:
-                return False, f"Blacklisted word detected: {word}"
+        # Check blacklisted words in one pass
+        reason = self._blacklist_reason(text, chat_id)
+        if reason:
+            return False, reason
         
         # Check for excessive caps
         if len(text) > 10:
@@ -63,14 +69,143 @@ class ModerationSystem:
             if caps_count / len(text) > 0.7:  # More than 70% caps
                 return False, "Excessive capital letters detected"
         
-        # Check for spam links
-        spam_domains = ['spam.com', 'scam.org', 'free-money.com']
-        for domain in spam_domains:
-            if domain in text_lower:
-                return False, f"Spam link detected: {domain}"
-        
         # Check message length
-        if len(text) > 4000:
-            return False, "Message too long (max 4000 characters)"
+        max_length = self.config.get('max_message_length', 4000)
+        if len(text) > max_length:
+            return False, f"Message too long (max {max_length} characters)"
         
-        return True, "Content OK"
\ No newline at end of file
+        return True, "Content OK"
+    
+    # ==================== SANCTIONS ====================
+    
+    def _sanctioned(self, kind: str) -> Dict:
+        return self.muted_users if kind == 'mute' else self.banned_users
+    
+    async def apply_sanction(self, chat_id: int, user_id: int, kind: str, duration: int = None,
+                             reason: str = "", admin_id: int = None) -> Optional[float]:
+        """Record a mute or ban, persist it and schedule its expiry"""
+        expires_at = time.time() + duration if duration else None
+        self._sanctioned(kind)[(chat_id, user_id)] = expires_at
+        
+        if expires_at:
+            self.sanctions.schedule(chat_id, user_id, kind, expires_at)
+        else:
+            self.sanctions.cancel(chat_id, user_id, kind)
+        
+        if self.db:
+            await self.db.save_sanction(chat_id, user_id, kind, expires_at, reason, admin_id)
+        return expires_at
+    
+    async def remove_sanction(self, chat_id: int, user_id: int, kind: str):
+        """Forget a sanction lifted before it expired"""
+        self.sanctions.cancel(chat_id, user_id, kind)
+        self._sanctioned(kind).pop((chat_id, user_id), None)
+        if self.db:
+            await self.db.remove_sanctions([(chat_id, user_id, kind)])
+    
+    def is_muted(self, chat_id: int, user_id: int) -> bool:
+        return (chat_id, user_id) in self.muted_users
+    
+    def is_banned(self, chat_id: int, user_id: int) -> bool:
+        return (chat_id, user_id) in self.banned_users
+    
+    async def restore_sanctions(self) -> int:
+        """Reload stored sanctions on startup; ones that expired offline are lifted right away"""
+        if not self.db:
+            return 0
+        
+        rows = await self.db.get_sanctions()
+        for row in rows:
+            key = (row['chat_id'], row['user_id'])
+            self._sanctioned(row['kind'])[key] = row['expires_at']
+            if row['expires_at']:
+                self.sanctions.schedule(row['chat_id'], row['user_id'], row['kind'], row['expires_at'])
+        return len(rows)
+    
+    async def run_expiry(self, lift: Callable[[int, List[Tuple[int, str]]], Awaitable[None]]):
+        """Lift expired sanctions with `lift(chat_id, [(user_id, kind), ...])` as they come due"""
+        async def lift_batch(chat_id: int, lifts: List[Tuple[int, str]]):
+            await lift(chat_id, lifts)
+            for user_id, kind in lifts:
+                self._sanctioned(kind).pop((chat_id, user_id), None)
+            if self.db:
+                await self.db.remove_sanctions([(chat_id, user_id, kind) for user_id, kind in lifts])
+        
+        await self.sanctions.run(lift_batch)
+    
+    # ==================== FAST PATH ====================
+    
+    def screen_message(self, user_id: int, chat_id: int, text: str,
+                       urls: Iterable[str] = ()) -> Optional[Tuple[str, str]]:
+        """Run the cheap checks every message passes before any DB or AI work
+        
+        `urls` are links Telegram extracted from the message entities.
+        Returns (check, reason) for the first failed check, or None.
+        Checks run cheapest first: flood, length, links, the blacklist,
+        then near-duplicate spam waves.
+        """
+        max_length = self.config.get('max_message_length', 4000)
+        checks = (
+            ('flood', lambda: "Message flood detected" if self.flood_control.hit((chat_id, user_id)) else None),
+            ('length', lambda: f"Message too long (max {max_length} characters)" if len(text) > max_length else None),
+            ('links', lambda: self._link_reason(text, chat_id, urls)),
+            ('blacklist', lambda: self._blacklist_reason(text, chat_id)),
+            ('duplicate', lambda: self._duplicate_reason(user_id, chat_id, text)),
+        )
+        
+        for name, check in checks:
+            started = time.perf_counter()
+            reason = check()
+            self._record_check(name, (time.perf_counter() - started) * 1e6, reason is not None)
+            if reason:
+                return name, reason
+        
+        return None
+    
+    def _blacklist_reason(self, text: str, chat_id: int) -> Optional[str]:
+        """Violation message for the first blacklisted term in text"""
+        match = self.content_filter.match(text, chat_id)
+        if not match:
+            return None
+        return f"Blacklisted word detected: {match[0]}"
+    
+    def _link_reason(self, text: str, chat_id: int, urls: Iterable[str] = ()) -> Optional[str]:
+        """Violation message for the first link to a blocked domain"""
+        hosts = extract_hosts(text, urls)
+        if not hosts:
+            return None
+        match = self.links.match(hosts, chat_id)
+        if not match:
+            return None
+        return f"Spam link detected: {match[0]}"
+    
+    def _duplicate_reason(self, user_id: int, chat_id: int, text: str) -> Optional[str]:
+        """Violation message if text is part of a copy-paste spam wave"""
+        if chat_id > 0:
+            return None
+        users = self.near_duplicates.check(chat_id, user_id, text)
+        if not users:
+            return None
+        return f"Copy-paste spam: {len(users)} users sent near-identical messages"
+    
+    def _record_check(self, name: str, elapsed_us: float, blocked: bool):
+        """Record the timing and outcome of one fast-path check"""
+        stats = self.screen_stats[name]
+        stats['runs'] += 1
+        stats['blocked'] += blocked
+        stats['total_us'] += elapsed_us
+        self.screen_latencies[name].append(elapsed_us)
+    
+    def get_screen_stats(self) -> Dict:
+        """Get per-check fast-path statistics"""
+        result = {}
+        for name, stats in self.screen_stats.items():
+            samples = sorted(self.screen_latencies[name])
+            result[name] = {
+                'runs': stats['runs'],
+                'blocked': stats['blocked'],
+                'avg_us': round(stats['total_us'] / max(stats['runs'], 1), 2),
+                'p99_us': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2) if samples else 0.0,
+            }
+        return result
+
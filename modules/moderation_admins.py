@@ -0,0 +1,114 @@
+"""
+Chat Admin Rights Cache for Moderation
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional
+
+ADMIN_STATUSES = ('creator', 'administrator')
+OWNER_RIGHT = 'owner'
+
+def member_rights(member) -> Optional[FrozenSet[str]]:
+    """Rights of a chat member as a set of flag names, None if not an admin
+
+    Works on Bot API ChatMember objects; the owner gets every right.
+    """
+    if member.status not in ADMIN_STATUSES:
+        return None
+    if member.status == 'creator':
+        return frozenset((OWNER_RIGHT,))
+    return frozenset(
+        name for name, value in member.to_dict().items()
+        if name.startswith('can_') and value is True
+    )
+
+class AdminCache:
+    """Per-chat admin rights, filled from getChatAdministrators
+
+    A chat's admin list is fetched once and reused for `ttl` seconds;
+    concurrent misses for the same chat share a single fetch. Admin
+    changes seen in chat_member updates are applied to the cached list
+    directly. Users in `global_admins` are admins everywhere.
+    """
+
+    def __init__(self, fetch: Callable[[int], Awaitable[Iterable]], ttl: float = 600,
+                 global_admins: Iterable[int] = ()):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.global_admins = frozenset(global_admins)
+        self.chats = {}  # chat_id -> (expires_at, {user_id: rights})
+        self.inflight = {}  # chat_id -> task fetching its admins
+        self.stats = {'hits': 0, 'fetches': 0, 'joined': 0, 'errors': 0, 'updates': 0}
+
+    async def _admins(self, chat_id: int) -> Dict[int, FrozenSet[str]]:
+        """Cached admins of a chat, fetching them once per TTL"""
+        entry = self.chats.get(chat_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self.stats['hits'] += 1
+            return entry[1]
+
+        task = self.inflight.get(chat_id)
+        if task is None:
+            task = self.inflight[chat_id] = asyncio.create_task(self._refresh(chat_id))
+            task.add_done_callback(lambda _: self.inflight.pop(chat_id, None))
+        else:
+            self.stats['joined'] += 1
+
+        try:
+            return await asyncio.shield(task)
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"Error fetching admins of {chat_id}: {e}")
+            # Keep using the expired list rather than locking admins out
+            return entry[1] if entry is not None else {}
+
+    async def _refresh(self, chat_id: int) -> Dict[int, FrozenSet[str]]:
+        """Fetch a chat's admins and cache them"""
+        self.stats['fetches'] += 1
+        members = await self.fetch(chat_id)
+        admins = {}
+        for member in members:
+            rights = member_rights(member)
+            if rights is not None:
+                admins[member.user.id] = rights
+        self.chats[chat_id] = (time.monotonic() + self.ttl, admins)
+        return admins
+
+    async def is_admin(self, chat_id: int, user_id: int, right: str = None) -> bool:
+        """Check if a user is a chat admin, optionally holding a specific right"""
+        if user_id in self.global_admins:
+            return True
+        if chat_id > 0:
+            return False  # private chats have no admins
+
+        rights = (await self._admins(chat_id)).get(user_id)
+        if rights is None:
+            return False
+        return right is None or right in rights or OWNER_RIGHT in rights
+
+    async def get_admin_ids(self, chat_id: int) -> List[int]:
+        """Get the user ids of a chat's admins"""
+        return list(await self._admins(chat_id))
+
+    def apply_member_update(self, chat_id: int, member):
+        """Apply an admin promotion or demotion seen in a chat_member update"""
+        entry = self.chats.get(chat_id)
+        if entry is None:
+            return
+
+        self.stats['updates'] += 1
+        rights = member_rights(member)
+        admins = entry[1]
+        if rights is None:
+            admins.pop(member.user.id, None)
+        else:
+            admins[member.user.id] = rights
+
+    def invalidate(self, chat_id: int):
+        """Drop a chat's cached admins so the next check refetches them"""
+        self.chats.pop(chat_id, None)
+
+    def get_stats(self) -> Dict:
+        """Get admin cache statistics"""
+        return {**self.stats, 'chats': len(self.chats)}
@@ -0,0 +1,87 @@
+"""
+Compiled Content Filter for Moderation
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+from utils.text_matcher import AhoCorasick, at_word_boundaries
+
+class ContentFilter:
+    """Blacklist matcher checking every banned term in one pass
+
+    Global terms come from MODERATION_CONFIG['blacklist'] (its domains
+    are handled by LinkFilter); chats may add their own. Each term list
+    is compiled into an Aho-Corasick automaton once, when it changes, so
+    the cost of a check depends on the message length rather than the
+    number of terms. Terms match anywhere inside the text, as the inline
+    blacklist always did, or with match_mode 'word' only as whole words.
+    """
+
+    def __init__(self, blacklist: Dict = None):
+        blacklist = blacklist or {}
+        whole_words = blacklist.get('match_mode', 'substring') == 'word'
+
+        self.global_terms = {}  # term -> (category, whole_word)
+        for word in blacklist.get('words', []):
+            self.global_terms[word.lower()] = ('word', whole_words)
+        for substring in blacklist.get('substrings', []):
+            self.global_terms[substring.lower()] = ('word', False)
+
+        self.chat_terms = {}  # chat_id -> {term: (category, whole_word)}
+        self._compiled = {}  # chat_id (None for global) -> AhoCorasick
+
+    # ==================== TERM LISTS ====================
+
+    def add_chat_terms(self, chat_id: int, terms: Iterable[str], whole_word: bool = True):
+        """Ban extra terms in one chat"""
+        chat_terms = self.chat_terms.setdefault(chat_id, {})
+        for term in terms:
+            chat_terms[term.lower()] = ('word', whole_word)
+        self._compiled.pop(chat_id, None)
+
+    def remove_chat_terms(self, chat_id: int, terms: Iterable[str]):
+        """Remove terms from a chat's list"""
+        chat_terms = self.chat_terms.get(chat_id, {})
+        for term in terms:
+            chat_terms.pop(term.lower(), None)
+        if not chat_terms:
+            self.chat_terms.pop(chat_id, None)
+        self._compiled.pop(chat_id, None)
+
+    def get_chat_terms(self, chat_id: int) -> Dict[str, Tuple[str, bool]]:
+        """Get a chat's own terms"""
+        return dict(self.chat_terms.get(chat_id, {}))
+
+    def _matcher(self, chat_id: Optional[int]) -> AhoCorasick:
+        """Compiled automaton for a chat (global terms plus its own)"""
+        key = chat_id if chat_id in self.chat_terms else None
+        matcher = self._compiled.get(key)
+        if matcher is None:
+            terms = self.global_terms if key is None else {**self.global_terms, **self.chat_terms[key]}
+            matcher = self._compiled[key] = AhoCorasick(
+                (term, (term, category, whole_word)) for term, (category, whole_word) in terms.items()
+            )
+        return matcher
+
+    # ==================== MATCHING ====================
+
+    def match(self, text: str, chat_id: int = None) -> Optional[Tuple[str, str]]:
+        """Return (term, category) of the first banned term in text, or None"""
+        matcher = self._matcher(chat_id)
+        if not len(matcher):
+            return None
+
+        text = text.lower()
+        for start, end, (term, category, whole_word) in matcher.iter_matches(text):
+            if whole_word and not at_word_boundaries(text, start, end):
+                continue
+            return term, category
+        return None
+
+    def get_stats(self) -> Dict:
+        """Get filter statistics"""
+        return {
+            'global_terms': len(self.global_terms),
+            'chats_with_terms': len(self.chat_terms),
+            'compiled': len(self._compiled),
+        }
@@ -0,0 +1,55 @@
+"""
+Flood Control for Moderation
+"""
+
+import time
+from typing import Dict, Hashable
+
+class FloodLimiter:
+    """Token-bucket flood limiter holding one float per active key
+
+    Implemented as GCRA: each key stores the time its bucket will have
+    drained. A message adds `window / limit` seconds; it is flood if the
+    bucket would hold more than `limit` messages. Keys whose bucket has
+    drained are idle and removed by sweep(), so memory follows the
+    number of users active within the last window.
+    """
+
+    def __init__(self, limit: int = 5, window: float = 10.0):
+        self.limit = limit
+        self.window = window
+        self.interval = window / limit
+        self.tolerance = window - self.interval  # burst of `limit` messages
+        self.drained_at = {}  # key -> monotonic time the bucket has drained
+        self.stats = {'checked': 0, 'flooded': 0, 'swept': 0}
+
+    def hit(self, key: Hashable, now: float = None) -> bool:
+        """Count a message; returns True if the key is flooding"""
+        now = time.monotonic() if now is None else now
+        self.stats['checked'] += 1
+
+        drained_at = max(self.drained_at.get(key, now), now)
+        flooding = drained_at - now > self.tolerance
+
+        # Messages sent while flooding still count, up to one full window
+        self.drained_at[key] = min(drained_at + self.interval, now + self.window)
+
+        if flooding:
+            self.stats['flooded'] += 1
+        return flooding
+
+    def sweep(self, now: float = None) -> int:
+        """Remove keys whose bucket has drained; returns how many"""
+        now = time.monotonic() if now is None else now
+        idle = [key for key, drained_at in self.drained_at.items() if drained_at <= now]
+        for key in idle:
+            del self.drained_at[key]
+        self.stats['swept'] += len(idle)
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self.drained_at)
+
+    def get_stats(self) -> Dict:
+        """Get limiter statistics"""
+        return {**self.stats, 'active_keys': len(self.drained_at)}
@@ -0,0 +1,96 @@
+"""
+Join-Raid Detection for Moderation
+"""
+
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+class JoinMonitor:
+    """Per-chat join-rate window and welcome coalescing
+
+    Joins are counted in a per-chat window holding at most
+    `raid_threshold` timestamps; a chat enters raid mode when that many
+    joins arrive within `raid_window` seconds and leaves it after
+    `raid_cooldown` quiet seconds. Members joining within
+    `coalesce_window` seconds are collected into one batch so they get
+    one welcome and one bonus transaction.
+    """
+
+    def __init__(self, config: Dict = None):
+        config = config or {}
+        self.coalesce_window = config.get('coalesce_window', 5)
+        self.raid_window = config.get('raid_window', 60)
+        self.raid_threshold = config.get('raid_threshold', 20)
+        self.raid_cooldown = config.get('raid_cooldown', 600)
+
+        self.join_times = {}  # chat_id -> deque of recent join times
+        self.raid_until = {}  # chat_id -> time raid mode ends
+        self.batches = {}  # chat_id -> [members, raid seen while batching]
+        self.stats = {'joins': 0, 'batches': 0, 'raids': 0}
+
+    def record_joins(self, chat_id: int, members: List, now: float = None) -> bool:
+        """Add members to the chat's pending batch
+
+        Returns True if this started a new batch; the caller should
+        flush it after `coalesce_window` seconds.
+        """
+        now = time.time() if now is None else now
+        self.stats['joins'] += len(members)
+
+        times = self.join_times.get(chat_id)
+        if times is None:
+            times = self.join_times[chat_id] = deque(maxlen=self.raid_threshold)
+        for _ in members:
+            times.append(now)
+
+        if len(times) == self.raid_threshold and now - times[0] <= self.raid_window:
+            if not self.in_raid(chat_id, now):
+                self.stats['raids'] += 1
+            self.raid_until[chat_id] = now + self.raid_cooldown
+
+        batch = self.batches.get(chat_id)
+        started = batch is None
+        if started:
+            batch = self.batches[chat_id] = [[], False]
+        batch[0].extend(members)
+        batch[1] = batch[1] or self.in_raid(chat_id, now)
+        return started
+
+    def flush(self, chat_id: int, now: float = None) -> Optional[Tuple[List, bool]]:
+        """Take the chat's pending batch as (members, raid)"""
+        batch = self.batches.pop(chat_id, None)
+        if batch is None:
+            return None
+        self.stats['batches'] += 1
+        members, raid = batch
+        return members, raid or self.in_raid(chat_id, now)
+
+    def in_raid(self, chat_id: int, now: float = None) -> bool:
+        """Check whether a chat is in raid mode"""
+        until = self.raid_until.get(chat_id)
+        if until is None:
+            return False
+        now = time.time() if now is None else now
+        if now < until:
+            return True
+        del self.raid_until[chat_id]
+        return False
+
+    def sweep(self, now: float = None) -> int:
+        """Forget join windows of chats without recent joins; returns how many"""
+        now = time.time() if now is None else now
+        idle = [chat_id for chat_id, times in self.join_times.items()
+                if not times or now - times[-1] > self.raid_window]
+        for chat_id in idle:
+            del self.join_times[chat_id]
+            self.in_raid(chat_id, now)
+        return len(idle)
+
+    def get_stats(self) -> Dict:
+        """Get join monitoring statistics"""
+        return {
+            **self.stats,
+            'chats_in_raid': len(self.raid_until),
+            'pending_batches': len(self.batches),
+        }
@@ -0,0 +1,289 @@
+"""
+Link Extraction and Domain Blocking for Moderation
+"""
+
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+HOST_CHARS_RE = re.compile(r'[\w.-]+')  # one character class: matches in linear time
+OBFUSCATED_DOT_RE = re.compile(r'\[\.\]|\(\.\)|\[dot\]|\(dot\)', re.IGNORECASE)
+MAX_HOST_LENGTH = 253
+DOTS = str.maketrans({'。': '.', '．': '.', '｡': '.'})
+
+def normalize_host(host: str) -> Optional[str]:
+    """Lowercase, IDNA-encoded host without port, credentials or trailing dot"""
+    host = host.translate(DOTS).strip().lower()
+    if '://' in host:
+        host = host.split('://', 1)[1]
+    host = host.split('/', 1)[0].rsplit('@', 1)[-1].split(':', 1)[0].strip('.')
+    if not host:
+        return None
+
+    if not host.isascii():
+        try:
+            host = host.encode('idna').decode('ascii')
+        except UnicodeError:
+            return None
+    return host
+
+def _deobfuscate(text: str) -> str:
+    """Turn "spam [.] com" style dots into real ones"""
+    parts = OBFUSCATED_DOT_RE.split(text)
+    if len(parts) == 1:
+        return text
+    last = len(parts) - 1
+    return '.'.join(
+        (part.lstrip() if index else part).rstrip() if index < last else part.lstrip()
+        for index, part in enumerate(parts)
+    )
+
+def _host_in(run: str) -> Optional[str]:
+    """The dotted host at the end of a run of host characters, if any
+
+    The host is the longest tail of non-empty labels ending in a letter
+    TLD or an IDNA (xn--) label; runs longer than a hostname can be are
+    skipped.
+    """
+    if len(run) > MAX_HOST_LENGTH:
+        return None
+    labels = run.strip('.').split('.')
+    start = len(labels)
+    while start and labels[start - 1]:
+        start -= 1
+    labels = labels[start:]
+    if len(labels) < 2:
+        return None
+
+    tld = labels[-1]
+    if (len(tld) >= 2 and tld.isalpha()) or tld.lower().startswith('xn--'):
+        return '.'.join(labels)
+    return None
+
+def extract_hosts(text: str, urls: Iterable[str] = ()) -> List[str]:
+    """Normalized hosts of links in a message, without duplicates
+
+    `urls` are links Telegram already extracted (url and text_link
+    entities); the text is scanned too so unmarked and obfuscated
+    links like "spam[.]com" are caught. The scan splits the text into
+    whitespace-separated tokens and those into runs of host characters,
+    so it stays linear in the message length.
+    """
+    hosts = dict.fromkeys(filter(None, map(normalize_host, urls)))
+
+    if '.' in text or '[' in text or '(' in text:
+        text = _deobfuscate(text.translate(DOTS))
+        for token in text.split():
+            if '.' not in token:
+                continue
+            for run in HOST_CHARS_RE.findall(token):
+                host = _host_in(run)
+                host = host and normalize_host(host)
+                if host:
+                    hosts[host] = None
+
+    return list(hosts)
+
+class DomainTrie:
+    """Set of domains matched by suffix, stored as a trie of reversed labels
+
+    "ads.example.com" is stored as com -> example -> ads, so a host is
+    checked by walking its labels from the right: the cost depends on
+    the host's label count, not on how many domains are stored. Leaf
+    domains are stored as the END marker instead of an empty dict.
+    """
+
+    END = True
+
+    def __init__(self, domains: Iterable[str] = ()):
+        self.root = {}
+        self.size = 0
+        for domain in domains:
+            self.add(domain)
+
+    def add(self, domain: str) -> bool:
+        """Add a domain (and all its subdomains); returns False if invalid or present"""
+        domain = normalize_host(domain)
+        if not domain:
+            return False
+
+        labels = domain.split('.')[::-1]
+        node = self.root
+        for label in labels[:-1]:
+            child = node.get(label)
+            if child is self.END:
+                return False  # a parent domain is already blocked
+            if child is None:
+                child = node[label] = {}
+            node = child
+
+        last = labels[-1]
+        if node.get(last) is self.END:
+            return False
+        # A parent covers every subdomain, so drop any stored below it
+        self.size += 1 - self._count(node.get(last))
+        node[last] = self.END
+        return True
+
+    def _count(self, node) -> int:
+        """Number of domains stored under a node"""
+        if node is None:
+            return 0
+        if node is self.END:
+            return 1
+        return sum(self._count(child) for child in node.values())
+
+    def remove(self, domain: str) -> bool:
+        """Remove a domain added earlier; returns True if it was present"""
+        domain = normalize_host(domain)
+        if not domain:
+            return False
+
+        labels = domain.split('.')[::-1]
+        path = []
+        node = self.root
+        for label in labels[:-1]:
+            child = node.get(label)
+            if not isinstance(child, dict):
+                return False
+            path.append((node, label))
+            node = child
+
+        if node.get(labels[-1]) is not self.END:
+            return False
+        del node[labels[-1]]
+        self.size -= 1
+
+        # Prune branches left empty
+        while path and not node:
+            parent, label = path.pop()
+            del parent[label]
+            node = parent
+        return True
+
+    def match(self, host: str) -> Optional[str]:
+        """Return the stored domain covering host, or None"""
+        labels = host.split('.')
+        node = self.root
+        for depth in range(len(labels) - 1, -1, -1):
+            node = node.get(labels[depth])
+            if node is None:
+                return None
+            if node is self.END:
+                return '.'.join(labels[depth:])
+        return None
+
+    def __contains__(self, host: str) -> bool:
+        return self.match(host) is not None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def domains(self) -> List[str]:
+        """All stored domains"""
+        result = []
+        stack = [(self.root, ())]
+        while stack:
+            node, suffix = stack.pop()
+            for label, child in node.items():
+                labels = (label,) + suffix
+                if child is self.END:
+                    result.append('.'.join(labels))
+                else:
+                    stack.append((child, labels))
+        return sorted(result)
+
+class LinkFilter:
+    """Blocked-domain check for every link in a message
+
+    Global domains come from MODERATION_CONFIG['blacklist']['domains']
+    and the blocklist file (one domain per line, hosts-file lines and #
+    comments allowed). Each chat may allow domains, which overrides any
+    block, or deny extra ones.
+    """
+
+    def __init__(self, config: Dict = None, domains: Iterable[str] = ()):
+        config = config or {}
+        self.blocked = DomainTrie(domains)
+        self.chat_allow = {}  # chat_id -> DomainTrie
+        self.chat_deny = {}  # chat_id -> DomainTrie
+        self.stats = {'checked': 0, 'hosts': 0, 'blocked': 0}
+
+        blocklist_file = config.get('blocklist_file')
+        if blocklist_file:
+            self.load_blocklist(blocklist_file)
+
+    def load_blocklist(self, path: str) -> int:
+        """Add the domains listed in a file; returns how many were added"""
+        if not os.path.exists(path):
+            return 0
+
+        added = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    fields = line.split('#', 1)[0].split()
+                    if fields:
+                        # hosts-file format: "0.0.0.0 domain"
+                        added += self.blocked.add(fields[-1])
+        except Exception as e:
+            print(f"Error loading domain blocklist {path}: {e}")
+        return added
+
+    # ==================== CHAT LISTS ====================
+
+    def allow_domains(self, chat_id: int, domains: Iterable[str]):
+        """Allow domains in one chat, even if blocked globally"""
+        trie = self.chat_allow.setdefault(chat_id, DomainTrie())
+        for domain in domains:
+            trie.add(domain)
+
+    def deny_domains(self, chat_id: int, domains: Iterable[str]):
+        """Block extra domains in one chat"""
+        trie = self.chat_deny.setdefault(chat_id, DomainTrie())
+        for domain in domains:
+            trie.add(domain)
+
+    def remove_chat_domains(self, chat_id: int, domains: Iterable[str]):
+        """Remove domains from a chat's allow and deny lists"""
+        for lists in (self.chat_allow, self.chat_deny):
+            trie = lists.get(chat_id)
+            if trie is None:
+                continue
+            for domain in domains:
+                trie.remove(domain)
+            if not len(trie):
+                del lists[chat_id]
+
+    def get_chat_lists(self, chat_id: int) -> Dict[str, List[str]]:
+        """Get a chat's allowed and denied domains"""
+        return {
+            'allow': self.chat_allow[chat_id].domains() if chat_id in self.chat_allow else [],
+            'deny': self.chat_deny[chat_id].domains() if chat_id in self.chat_deny else [],
+        }
+
+    # ==================== MATCHING ====================
+
+    def match(self, hosts: List[str], chat_id: int = None) -> Optional[Tuple[str, str]]:
+        """Return (host, blocked domain) for the first blocked host, or None"""
+        self.stats['checked'] += 1
+        self.stats['hosts'] += len(hosts)
+
+        allow = self.chat_allow.get(chat_id)
+        deny = self.chat_deny.get(chat_id)
+        for host in hosts:
+            if allow is not None and host in allow:
+                continue
+            domain = (deny.match(host) if deny is not None else None) or self.blocked.match(host)
+            if domain:
+                self.stats['blocked'] += 1
+                return host, domain
+        return None
+
+    def get_stats(self) -> Dict:
+        """Get link filter statistics"""
+        return {
+            **self.stats,
+            'blocked_domains': len(self.blocked),
+            'chats_with_lists': len(self.chat_allow.keys() | self.chat_deny.keys()),
+        }
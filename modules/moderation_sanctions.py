@@ -0,0 +1,103 @@
+"""
+Sanction Expiry Scheduling for Moderation
+"""
+
+import asyncio
+import heapq
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+SanctionKey = Tuple[int, int, str]  # (chat_id, user_id, kind)
+
+class SanctionScheduler:
+    """Min-heap of sanction expiries driving a single timer
+
+    The run() task sleeps until the earliest expiry (or until an earlier
+    one is scheduled) instead of polling. Due sanctions are collected
+    together with any expiring within `batch_window` seconds and handed
+    to the lift callback grouped per chat. Rescheduled or cancelled
+    entries are left in the heap and skipped when popped.
+    """
+
+    def __init__(self, batch_window: float = 1.0):
+        self.batch_window = batch_window
+        self.heap: List[Tuple[float, int, int, str]] = []
+        self.expiries: Dict[SanctionKey, float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats = {'scheduled': 0, 'lifted': 0, 'batches': 0}
+
+    def schedule(self, chat_id: int, user_id: int, kind: str, expires_at: float):
+        """Schedule (or reschedule) the end of a sanction"""
+        self.expiries[(chat_id, user_id, kind)] = expires_at
+        heapq.heappush(self.heap, (expires_at, chat_id, user_id, kind))
+        self.stats['scheduled'] += 1
+
+        if len(self.heap) > 2 * len(self.expiries) + 64:
+            self._compact()
+
+        # Wake the timer if this is now the earliest expiry
+        if self._wakeup is not None and self.heap[0][0] == expires_at:
+            self._wakeup.set()
+
+    def cancel(self, chat_id: int, user_id: int, kind: str) -> bool:
+        """Forget a sanction lifted early; returns True if it was scheduled"""
+        return self.expiries.pop((chat_id, user_id, kind), None) is not None
+
+    def _compact(self):
+        """Drop stale heap entries left by rescheduling and cancelling"""
+        self.heap = [(expires_at, *key) for key, expires_at in self.expiries.items()]
+        heapq.heapify(self.heap)
+
+    def pop_due(self, now: float = None) -> Dict[int, List[Tuple[int, str]]]:
+        """Remove sanctions due by now (plus the batch window), grouped per chat"""
+        now = time.time() if now is None else now
+        deadline = now + self.batch_window
+        due = defaultdict(list)
+
+        while self.heap and self.heap[0][0] <= deadline:
+            expires_at, chat_id, user_id, kind = heapq.heappop(self.heap)
+            key = (chat_id, user_id, kind)
+            if self.expiries.get(key) != expires_at:
+                continue  # rescheduled or cancelled
+            del self.expiries[key]
+            due[chat_id].append((user_id, kind))
+
+        return due
+
+    def next_expiry(self) -> Optional[float]:
+        """Earliest live expiry, discarding stale entries on top of the heap"""
+        while self.heap:
+            expires_at, chat_id, user_id, kind = self.heap[0]
+            if self.expiries.get((chat_id, user_id, kind)) == expires_at:
+                return expires_at
+            heapq.heappop(self.heap)
+        return None
+
+    async def run(self, lift: Callable[[int, List[Tuple[int, str]]], Awaitable[None]]):
+        """Lift sanctions as they expire; runs until cancelled"""
+        self._wakeup = asyncio.Event()
+        while True:
+            next_expiry = self.next_expiry()
+            timeout = None if next_expiry is None else max(0.0, next_expiry - time.time())
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            for chat_id, lifts in self.pop_due().items():
+                self.stats['batches'] += 1
+                self.stats['lifted'] += len(lifts)
+                try:
+                    await lift(chat_id, lifts)
+                except Exception as e:
+                    print(f"Error lifting sanctions in {chat_id}: {e}")
+
+    def __len__(self) -> int:
+        return len(self.expiries)
+
+    def get_stats(self) -> Dict:
+        """Get scheduler statistics"""
+        return {**self.stats, 'pending': len(self.expiries), 'heap_size': len(self.heap)}
@@ -0,0 +1,174 @@
+"""
+Near-Duplicate Spam Detection for Moderation
+"""
+
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from modules.ai_tokenizer import Tokenizer
+
+MASK64 = (1 << 64) - 1
+REPEAT_RE = re.compile(r'(.)\1+')
+
+def simhash(features: List[str]) -> int:
+    """64-bit SimHash of a list of features
+
+    Per-bit vote counts are kept bit-sliced: plane i holds bit i of every
+    counter, so adding a feature's hash is a ripple-carry over a handful
+    of integers instead of a loop over 64 counters.
+    """
+    planes = []
+    for feature in features:
+        carry = hash(feature) & MASK64
+        i = 0
+        while carry:
+            if i == len(planes):
+                planes.append(carry)
+                break
+            plane = planes[i]
+            planes[i] = plane ^ carry
+            carry &= plane
+            i += 1
+
+    # A bit is set when more than half the features voted for it
+    threshold = len(features) // 2
+    greater, equal = 0, MASK64
+    for i in range(len(planes) - 1, -1, -1):
+        if threshold >> i & 1:
+            equal &= planes[i]
+        else:
+            greater |= equal & planes[i]
+            equal &= ~planes[i]
+    return greater
+
+class ChatFingerprints:
+    """Fixed-size ring of recent fingerprints in one chat, with a band index
+
+    The index maps each band of a fingerprint to the slots holding it, so
+    only messages agreeing exactly on some band have their distance
+    checked.
+    """
+
+    __slots__ = ('fingerprints', 'user_ids', 'timestamps', 'head', 'index')
+
+    def __init__(self, size: int):
+        self.fingerprints = [0] * size
+        self.user_ids = [0] * size
+        self.timestamps = [0.0] * size
+        self.head = 0
+        self.index = {}  # (band, value) -> set of slots
+
+class NearDuplicateDetector:
+    """Per-chat detection of copy-paste spam with small variations
+
+    Each message is reduced to a SimHash of its words and word pairs and
+    kept in its chat's ring of `window_size` fingerprints. A message is
+    flagged when more than `max_users` distinct users posted text within
+    `max_distance` bits of it in the last `window_seconds`. Memory is
+    fixed per chat; at most `max_chats` chats are tracked.
+    """
+
+    def __init__(self, config: Dict = None):
+        config = config or {}
+        self.window_size = config.get('window_size', 200)
+        self.window_seconds = config.get('window_seconds', 60)
+        self.max_users = config.get('max_users', 3)
+        self.max_distance = config.get('max_distance', 10)
+        self.min_words = config.get('min_words', 4)
+        self.max_chats = config.get('max_chats', 5000)
+
+        # Fingerprints closer than `bands` bits always share a band; farther
+        # near-duplicates are found with high probability, and a spam wave
+        # only needs each poster to match one of the earlier copies
+        self.bands = config.get('bands', 8)
+        self.band_bits = 64 // self.bands
+        self.band_mask = (1 << self.band_bits) - 1
+
+        self.chats = OrderedDict()  # chat_id -> ChatFingerprints
+        self.stats = {'checked': 0, 'skipped': 0, 'flagged': 0, 'evicted_chats': 0}
+
+    def fingerprint(self, text: str) -> Optional[int]:
+        """SimHash of a message's words and word pairs, None if too short"""
+        words = Tokenizer.WORD_RE.findall(REPEAT_RE.sub(r'\1', text.lower()))
+        if len(words) < self.min_words:
+            return None
+        return simhash(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+    def _band_keys(self, fingerprint: int) -> List[Tuple[int, int]]:
+        """Index keys of a fingerprint's bands"""
+        bits, mask = self.band_bits, self.band_mask
+        return [(band, fingerprint >> (band * bits) & mask) for band in range(self.bands)]
+
+    def _chat(self, chat_id: int) -> ChatFingerprints:
+        """Fingerprint ring for a chat, evicting the least recently active chat"""
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            chat = self.chats[chat_id] = ChatFingerprints(self.window_size)
+            if len(self.chats) > self.max_chats:
+                self.chats.popitem(last=False)
+                self.stats['evicted_chats'] += 1
+        else:
+            self.chats.move_to_end(chat_id)
+        return chat
+
+    def check(self, chat_id: int, user_id: int, text: str, now: float = None) -> Optional[List[int]]:
+        """Record a message; returns the users posting it if it is a spam wave"""
+        fingerprint = self.fingerprint(text)
+        if fingerprint is None:
+            self.stats['skipped'] += 1
+            return None
+
+        now = time.time() if now is None else now
+        self.stats['checked'] += 1
+        chat = self._chat(chat_id)
+        bands = self._band_keys(fingerprint)
+
+        since = now - self.window_seconds
+        users = {user_id}
+        seen = set()
+        for key in bands:
+            for slot in chat.index.get(key, ()):
+                if slot in seen:
+                    continue
+                seen.add(slot)
+                if (chat.timestamps[slot] >= since
+                        and bin(chat.fingerprints[slot] ^ fingerprint).count('1') <= self.max_distance):
+                    users.add(chat.user_ids[slot])
+            if len(users) > self.max_users:
+                break
+
+        self._insert(chat, bands, fingerprint, user_id, now)
+
+        if len(users) > self.max_users:
+            self.stats['flagged'] += 1
+            return sorted(users)
+        return None
+
+    def _insert(self, chat: ChatFingerprints, bands: List[Tuple[int, int]], fingerprint: int,
+                user_id: int, now: float):
+        """Overwrite the chat's oldest slot and re-index it"""
+        slot = chat.head
+        if chat.timestamps[slot]:
+            for key in self._band_keys(chat.fingerprints[slot]):
+                slots = chat.index.get(key)
+                if slots is not None:
+                    slots.discard(slot)
+                    if not slots:
+                        del chat.index[key]
+
+        chat.fingerprints[slot] = fingerprint
+        chat.user_ids[slot] = user_id
+        chat.timestamps[slot] = now
+        for key in bands:
+            chat.index.setdefault(key, set()).add(slot)
+        chat.head = (slot + 1) % self.window_size
+
+    def clear_chat(self, chat_id: int):
+        """Forget a chat's recent messages"""
+        self.chats.pop(chat_id, None)
+
+    def get_stats(self) -> Dict:
+        """Get detector statistics"""
+        return {**self.stats, 'chats': len(self.chats)}
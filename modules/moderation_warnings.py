@@ -0,0 +1,92 @@
+"""
+Warning Tracking for Moderation
+"""
+
+import bisect
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Tuple
+
+class WarningService:
+    """Per-(chat, user) warning counts backed by the warnings table
+
+    Each cached entry is the deque of a user's active warning times in
+    one chat, oldest first. Warnings older than `warning_expiry_days`
+    are dropped from the front when the entry is read, so a count is
+    O(1) and the table is only read, through its (chat_id, user_id,
+    timestamp) index, on a cache miss.
+    """
+
+    def __init__(self, config: Dict = None, db=None):
+        config = config or {}
+        self.db = db
+        self.expiry = config.get('warning_expiry_days', 30) * 86400
+        self.cache_size = config.get('warning_cache_size', 10000)
+        self.cache = OrderedDict()  # (chat_id, user_id) -> deque of warning times
+        self.stats = {'added': 0, 'hits': 0, 'misses': 0, 'expired': 0}
+
+        # Escalation steps as (active warnings, kind, duration); without an
+        # explicit table the nth warning gets the nth mute, then a ban
+        steps = config.get('warning_escalation')
+        if steps is None:
+            durations = list(config.get('mute_durations', {}).values())
+            max_warnings = config.get('max_warnings', 3)
+            steps = [(count, 'mute', durations[min(count, len(durations)) - 1])
+                     for count in range(1, max_warnings + 1) if durations]
+            steps.append((max_warnings + 1 if durations else 1, 'ban', None))
+        self.steps = sorted((tuple(step) for step in steps), key=lambda step: step[0])
+        self.thresholds = [step[0] for step in self.steps]
+
+    async def _active(self, chat_id: int, user_id: int, now: float) -> deque:
+        """Cached active warning times, loading and expiring them as needed"""
+        key = (chat_id, user_id)
+        times = self.cache.get(key)
+        if times is None:
+            self.stats['misses'] += 1
+            loaded = await self.db.get_warning_times(chat_id, user_id, now - self.expiry) if self.db else []
+            times = self.cache[key] = deque(loaded)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.stats['hits'] += 1
+            self.cache.move_to_end(key)
+
+        since = now - self.expiry
+        while times and times[0] < since:
+            times.popleft()
+            self.stats['expired'] += 1
+        return times
+
+    async def add(self, chat_id: int, user_id: int, reason: str = "", admin_id: int = None) -> int:
+        """Record a warning; returns the user's active warnings in the chat"""
+        now = time.time()
+        times = await self._active(chat_id, user_id, now)
+        if self.db:
+            await self.db.add_warning(user_id, chat_id, reason, admin_id)
+        times.append(now)
+        self.stats['added'] += 1
+        return len(times)
+
+    async def count(self, chat_id: int, user_id: int) -> int:
+        """Get a user's active warnings in a chat"""
+        return len(await self._active(chat_id, user_id, time.time()))
+
+    async def clear(self, chat_id: int, user_id: int) -> int:
+        """Remove a user's warnings in a chat; returns how many were active"""
+        active = len(await self._active(chat_id, user_id, time.time()))
+        self.cache[(chat_id, user_id)] = deque()
+        if self.db:
+            await self.db.clear_warnings(chat_id, user_id)
+        return active
+
+    def escalation(self, warning_count: int) -> Optional[Tuple[str, Optional[int]]]:
+        """Sanction as (kind, duration) once a user has this many warnings, or None"""
+        index = bisect.bisect_right(self.thresholds, warning_count) - 1
+        if index < 0:
+            return None
+        _, kind, duration = self.steps[index]
+        return kind, duration
+
+    def get_stats(self) -> Dict:
+        """Get warning cache statistics"""
+        return {**self.stats, 'cached': len(self.cache)}
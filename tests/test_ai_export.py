@@ -0,0 +1,49 @@
+"""
+Tests for columnar AI knowledge export/import
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from modules.ai_export import export_knowledge, import_knowledge
+from modules.ai_system import SelfLearningAI
+
+@pytest.fixture
+def ai(tmp_path):
+    ai = SelfLearningAI(str(tmp_path / "knowledge.pkl"), {'group_shard_dir': str(tmp_path / "groups")})
+    ai.learn("hello there friend", "hi", 1, -5)
+    ai.save_knowledge()
+    return ai
+
+def test_import_replaces_groups(ai, tmp_path):
+    export_knowledge(ai, str(tmp_path / "archive"))
+    ai.learn("another group message", "ok", 2, -9)
+    ai.save_knowledge()
+
+    import_knowledge(ai, str(tmp_path / "archive"))
+    assert sorted(os.listdir(tmp_path / "groups")) == ["group_-5.pkl"]
+    assert ai.groups.get(-9) is None
+    assert list(ai.groups.get(-5)) == ["hello there friend"]
+
+@pytest.mark.parametrize('damage', ['missing', 'truncated'])
+def test_failed_import_keeps_knowledge(ai, tmp_path, damage):
+    archive = tmp_path / "archive"
+    export_knowledge(ai, str(archive))
+    ai.learn("another group message", "ok", 2, -9)
+    ai.save_knowledge()
+    knowledge = ai.knowledge
+
+    if damage == 'missing':
+        os.remove(archive / "word_weights.npy")
+    else:
+        # Parsed last, after the group shards
+        np.save(archive / "response_offsets.npy", np.zeros(0, dtype=np.int64))
+
+    with pytest.raises(Exception):
+        import_knowledge(ai, str(archive))
+
+    assert ai.knowledge is knowledge
+    assert sorted(os.listdir(tmp_path / "groups")) == ["group_-5.pkl", "group_-9.pkl"]
+    assert list(ai.groups.get(-9)) == ["another group message"]
@@ -0,0 +1,22 @@
+"""
+Tests for the compiled moderation blacklist
+"""
+
+from modules.moderation_filter import ContentFilter
+
+def test_words_match_anywhere_by_default():
+    content_filter = ContentFilter({'words': ['hack', 'spam']})
+    assert content_filter.match("join our hackathon") == ('hack', 'word')
+    assert content_filter.match("FREESPAMOFFER") == ('spam', 'word')
+
+def test_word_mode_matches_whole_words():
+    content_filter = ContentFilter({'words': ['hack'], 'match_mode': 'word', 'substrings': ['scam']})
+    assert content_filter.match("join our hackathon") is None
+    assert content_filter.match("how to hack it") == ('hack', 'word')
+    assert content_filter.match("a scammer") == ('scam', 'word')
+
+def test_chat_terms():
+    content_filter = ContentFilter({'words': ['spam']})
+    content_filter.add_chat_terms(-1, ['casino'])
+    assert content_filter.match("best casino here", chat_id=-1) == ('casino', 'word')
+    assert content_filter.match("best casino here", chat_id=-2) is None
@@ -0,0 +1,27 @@
+"""
+Tests for link extraction in moderation
+"""
+
+import time
+
+import pytest
+
+from modules.moderation_links import extract_hosts
+
+def test_extracts_plain_and_obfuscated_hosts():
+    text = "see http://user@Ads.Example.COM:8080/x, (spam.com) and bad [.] net"
+    assert extract_hosts(text) == ['ads.example.com', 'spam.com', 'bad.net']
+
+def test_ignores_non_hosts():
+    assert extract_hosts("version 2.0, e.g. 1.5 or spam.com-foo") == []
+
+@pytest.mark.parametrize('text', [
+    'a' * 4000 + '.',
+    'a.' * 2000,
+    'x. ' + ' ' * 3998,
+    '[.]' + '-' * 3997,
+])
+def test_pathological_input_is_linear(text):
+    started = time.perf_counter()
+    extract_hosts(text)
+    assert time.perf_counter() - started < 0.02
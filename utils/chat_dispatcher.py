@@ -0,0 +1,210 @@
+"""
+Per-Chat Ordered Update Dispatching
+Application subclass processing updates concurrently across chats,
+installed with Application.builder().application_class()
+"""
+
+import asyncio
+import bisect
+import heapq
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List
+
+from telegram import Update
+from telegram.ext import Application
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of handler latencies in milliseconds"""
+
+    BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    __slots__ = ('counts', 'total_ms', 'max_ms')
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float):
+        self.counts[bisect.bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile"""
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return self.BOUNDS_MS[index] if index < len(self.BOUNDS_MS) else self.max_ms
+        return 0.0
+
+    def to_dict(self) -> Dict:
+        count = self.count
+        return {
+            'count': count,
+            'avg_ms': round(self.total_ms / count, 2) if count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': round(self.max_ms, 2),
+            'buckets': dict(zip([*map(str, self.BOUNDS_MS), 'inf'], self.counts)),
+        }
+
+class ChatOrderedApplication(Application):
+    """Application handling chats concurrently but each chat in order
+
+    process_update() only appends the update to its chat's queue, so the
+    update fetcher never waits on a handler. `dispatch_workers` workers
+    take chats with pending updates from a shared queue; a chat is held
+    by one worker at a time, which handles at most `dispatch_batch` of
+    its updates before the chat goes to the back of the line. Updates
+    without a chat are keyed by user. At most `max_pending` updates are
+    queued before the fetcher is held back. stop() waits up to
+    `drain_timeout` seconds for queued updates to be handled.
+
+    Handler latency is kept as a histogram per chat, for the
+    `max_tracked_chats` most recently active chats, and overall.
+    """
+
+    def __init__(self, *, dispatch_workers: int = 16, dispatch_batch: int = 8,
+                 max_pending: int = 1000, max_tracked_chats: int = 1000, drain_timeout: float = 10,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.dispatch_workers = dispatch_workers
+        self.dispatch_batch = dispatch_batch
+        self.max_pending = max_pending
+        self.max_tracked_chats = max_tracked_chats
+        self.drain_timeout = drain_timeout
+
+        self.chat_queues: Dict[object, deque] = {}
+        self.ready_chats = None
+        self._pending = None
+        self._workers: List[asyncio.Task] = []
+
+        self.latency = LatencyHistogram()
+        self.chat_latency = OrderedDict()  # chat key -> LatencyHistogram
+        self.wait = LatencyHistogram()
+        self.dispatch_stats = {'dispatched': 0, 'errors': 0, 'max_queue': 0}
+
+    # ==================== LIFECYCLE ====================
+
+    async def start(self) -> None:
+        self.ready_chats = asyncio.Queue()
+        self._pending = asyncio.Semaphore(self.max_pending)
+        self._workers = [asyncio.create_task(self._dispatch_worker()) for _ in range(self.dispatch_workers)]
+        await super().start()
+
+    async def stop(self) -> None:
+        # Handle queued updates before Application.stop() waits for create_task()
+        # tasks and flushes persistence, so their handlers run to completion
+        if self.running and self._workers:
+            try:
+                await asyncio.wait_for(self._drain(), self.drain_timeout)
+            except asyncio.TimeoutError:
+                queued = self.update_queue.qsize() + sum(len(queue) for queue in self.chat_queues.values())
+                print(f"Dispatcher stopping with {queued} updates in {len(self.chat_queues)} chats not handled")
+
+        await super().stop()
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _drain(self):
+        """Wait until every fetched update has been handed to its chat and handled"""
+        await self.update_queue.join()
+        while self.chat_queues:
+            await asyncio.sleep(0.05)
+
+    # ==================== DISPATCH ====================
+
+    @staticmethod
+    def _chat_key(update: object):
+        """Ordering key of an update: its chat, else its user, else itself"""
+        if isinstance(update, Update):
+            if update.effective_chat:
+                return update.effective_chat.id
+            if update.effective_user:
+                return ('user', update.effective_user.id)
+        return ('update', id(update))
+
+    async def process_update(self, update: object) -> None:
+        if not self._workers:
+            # Not started (e.g. processing updates by hand): handle inline
+            return await super().process_update(update)
+
+        await self._pending.acquire()
+        key = self._chat_key(update)
+        queue = self.chat_queues.get(key)
+        if queue is None:
+            queue = self.chat_queues[key] = deque()
+            self.ready_chats.put_nowait(key)
+        queue.append((update, time.monotonic()))
+        self.dispatch_stats['max_queue'] = max(self.dispatch_stats['max_queue'], len(queue))
+
+    async def _dispatch_worker(self):
+        """Handle the pending updates of one chat at a time; runs until cancelled"""
+        while True:
+            key = await self.ready_chats.get()
+            queue = self.chat_queues[key]
+
+            for _ in range(self.dispatch_batch):
+                if not queue:
+                    break
+                update, enqueued_at = queue.popleft()
+                started = time.monotonic()
+                try:
+                    await super().process_update(update)
+                except Exception as e:
+                    self.dispatch_stats['errors'] += 1
+                    print(f"Error processing update in {key}: {e}")
+                finally:
+                    self._record(key, started - enqueued_at, time.monotonic() - started)
+                    self._pending.release()
+
+            if queue:
+                self.ready_chats.put_nowait(key)
+            else:
+                del self.chat_queues[key]
+
+    def _record(self, key, wait: float, elapsed: float):
+        """Record one update's queue wait and handler latency"""
+        self.dispatch_stats['dispatched'] += 1
+        self.wait.record(wait * 1000)
+        self.latency.record(elapsed * 1000)
+
+        histogram = self.chat_latency.get(key)
+        if histogram is None:
+            histogram = self.chat_latency[key] = LatencyHistogram()
+            if len(self.chat_latency) > self.max_tracked_chats:
+                self.chat_latency.popitem(last=False)
+        else:
+            self.chat_latency.move_to_end(key)
+        histogram.record(elapsed * 1000)
+
+    # ==================== METRICS ====================
+
+    def get_dispatch_stats(self, top: int = 10) -> Dict:
+        """Dispatcher counters, overall latency and the slowest chats by p95"""
+        slowest = heapq.nlargest(top, self.chat_latency.items(), key=lambda item: item[1].percentile(0.95))
+        return {
+            **self.dispatch_stats,
+            'workers': len(self._workers),
+            'active_chats': len(self.chat_queues),
+            'queued': sum(len(queue) for queue in self.chat_queues.values()),
+            'wait': self.wait.to_dict(),
+            'latency': self.latency.to_dict(),
+            'chats': {str(key): histogram.to_dict() for key, histogram in slowest},
+        }
+
+    def get_chat_latency(self, chat_id) -> Dict:
+        """Handler latency histogram of one chat"""
+        histogram = self.chat_latency.get(chat_id)
+        return histogram.to_dict() if histogram else LatencyHistogram().to_dict()
@@ -184,6 +184,57 @@ class Database:
         
         return 0
     
+    async def update_users_balance(self, user_ids: List[int], amount: int, reason: str = "") -> int:
+        """Credit (or debit) the same amount to many users in one transaction
+        
+        Like update_user_balance, unknown users are skipped. Returns the
+        number of users updated.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return 0
+        
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                balances = {}
+                for start in range(0, len(user_ids), 500):
+                    chunk = user_ids[start:start + 500]
+                    placeholders = ', '.join('?' * len(chunk))
+                    
+                    await db.execute(
+                        f"UPDATE users SET balance = balance + ? WHERE user_id IN ({placeholders})",
+                        (amount, *chunk)
+                    )
+                    await db.execute(f"""
+                        INSERT INTO transactions
+                        (user_id, amount, type, reason, balance_after)
+                        SELECT user_id, ?, ?, ?, balance FROM users WHERE user_id IN ({placeholders})
+                    """, (amount, 'credit' if amount > 0 else 'debit', reason, *chunk))
+                    
+                    async with db.execute(
+                        f"SELECT user_id, balance FROM users WHERE user_id IN ({placeholders})", chunk
+                    ) as cursor:
+                        balances.update(await cursor.fetchall())
+                
+                await db.commit()
+                
+                # Update local cache
+                cached = self.local_data.get('users', {})
+                changed = False
+                for user_id, balance in balances.items():
+                    if str(user_id) in cached:
+                        cached[str(user_id)]['balance'] = balance
+                        changed = True
+                if changed:
+                    self._save_local_data()
+                
+                return len(balances)
+        
+        except Exception as e:
+            print(f"Error updating balance for {len(user_ids)} users: {e}")
+        
+        return 0
+    
     # ==================== GROUP OPERATIONS ====================
     
     async def save_group(self, group_id: int, data: Dict) -> bool:
@@ -335,8 +386,8 @@ class Database:
     
     # ==================== WARNING OPERATIONS ====================
     
-    async def add_warning(self, user_id: int, chat_id: int, reason: str, admin_id: int) -> int:
-        """Add warning to user"""
+    async def add_warning(self, user_id: int, chat_id: int, reason: str, admin_id: int) -> bool:
+        """Add warning to user (active counts are kept by WarningService)"""
         try:
             async with aiosqlite.connect(self.db_path) as db:
                 cursor = await db.cursor()
@@ -348,29 +399,108 @@ class Database:
                     VALUES (?, ?, ?, ?)
                 """, (user_id, chat_id, reason, admin_id))
                 
-                # Count total warnings
+                # Update user's lifetime warnings count
                 await cursor.execute(
-                    "SELECT COUNT(*) FROM warnings WHERE user_id = ?",
+                    "UPDATE users SET warnings = warnings + 1 WHERE user_id = ?",
                     (user_id,)
                 )
-                result = await cursor.fetchone()
-                total_warnings = result[0] if result else 0
                 
                 await db.commit()
+                return True
                 
-                # Update user warnings count
-                await cursor.execute(
-                    "UPDATE users SET warnings = ? WHERE user_id = ?",
-                    (total_warnings, user_id)
+        except Exception as e:
+            print(f"Error adding warning for {user_id}: {e}")
+            return False
+    
+    async def get_warning_times(self, chat_id: int, user_id: int, since: float) -> List[float]:
+        """Get epoch times of a user's warnings in a chat since a time, oldest first"""
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                async with db.execute("""
+                    SELECT CAST(strftime('%s', timestamp) AS REAL) FROM warnings
+                    WHERE chat_id = ? AND user_id = ? AND timestamp >= datetime(?, 'unixepoch')
+                    ORDER BY timestamp
+                """, (chat_id, user_id, since)) as cursor:
+                    return [row[0] for row in await cursor.fetchall()]
+                
+        except Exception as e:
+            print(f"Error fetching warnings for {user_id} in {chat_id}: {e}")
+            return []
+    
+    async def clear_warnings(self, chat_id: int, user_id: int) -> int:
+        """Delete a user's warnings in a chat; returns how many were deleted"""
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                cursor = await db.execute(
+                    "DELETE FROM warnings WHERE chat_id = ? AND user_id = ?",
+                    (chat_id, user_id)
+                )
+                deleted = cursor.rowcount
+                
+                await db.execute(
+                    "UPDATE users SET warnings = MAX(warnings - ?, 0) WHERE user_id = ?",
+                    (deleted, user_id)
                 )
                 
                 await db.commit()
-                return total_warnings
+                return deleted
                 
         except Exception as e:
-            print(f"Error adding warning for {user_id}: {e}")
+            print(f"Error clearing warnings for {user_id} in {chat_id}: {e}")
             return 0
     
+    # ==================== SANCTION OPERATIONS ====================
+    
+    async def save_sanction(self, chat_id: int, user_id: int, kind: str, expires_at: Optional[float],
+                            reason: str = "", admin_id: int = None) -> bool:
+        """Save an active mute or ban (expires_at is epoch seconds, None for permanent)"""
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.execute("""
+                    INSERT OR REPLACE INTO sanctions
+                    (chat_id, user_id, kind, reason, admin_id, created_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?, strftime('%s', 'now'), ?)
+                """, (chat_id, user_id, kind, reason, admin_id, expires_at))
+                
+                await db.commit()
+                return True
+                
+        except Exception as e:
+            print(f"Error saving {kind} for {user_id} in {chat_id}: {e}")
+            return False
+    
+    async def remove_sanctions(self, sanctions: List[tuple]) -> bool:
+        """Remove lifted sanctions, given as (chat_id, user_id, kind), in one transaction"""
+        if not sanctions:
+            return True
+        
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.executemany(
+                    "DELETE FROM sanctions WHERE chat_id = ? AND user_id = ? AND kind = ?",
+                    sanctions
+                )
+                
+                await db.commit()
+                return True
+                
+        except Exception as e:
+            print(f"Error removing {len(sanctions)} sanctions: {e}")
+            return False
+    
+    async def get_sanctions(self) -> List[Dict]:
+        """Get all stored sanctions, including ones that expired while offline"""
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                db.row_factory = sqlite3.Row
+                cursor = await db.execute("SELECT * FROM sanctions")
+                rows = await cursor.fetchall()
+                return [dict(row) for row in rows]
+                
+        except Exception as e:
+            print(f"Error fetching sanctions: {e}")
+            return []
+    
     # ==================== BACKUP OPERATIONS ====================
     
     async def create_backup(self) -> str:
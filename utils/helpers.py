@@ -5,8 +5,10 @@ Helper Functions for Telegram Bot
 import re
 import random
 import string
+import sys
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
+from collections import deque
 import math
 
 def format_time(seconds: int) -> str:
@@ -199,4 +201,25 @@ def calculate_level_from_xp(xp: int) -> Tuple[int, int, int]:
     xp_current = xp
     xp_required = xp_needed
     
-    return level, xp_current, xp_required
\ No newline at end of file
+    return level, xp_current, xp_required
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """Approximate memory footprint of an object and everything it references"""
+    seen = set() if seen is None else seen
+    size = 0
+    stack = [obj]
+    
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+    
+    return size
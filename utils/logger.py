@@ -6,6 +6,7 @@ import logging
 import os
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
+from typing import Dict
 
 def setup_logger():
     """Setup logger configuration"""
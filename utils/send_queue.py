@@ -0,0 +1,367 @@
+"""
+Outbound Telegram API Send Queue
+Rate limiter for every request the bot makes, plugged in through
+Application.builder().rate_limiter()
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+LANES = ('reply', 'normal', 'broadcast')
+QUEUED_PREFIXES = ('send', 'edit', 'copy', 'forward')
+EDIT_ENDPOINTS = frozenset(('editMessageText', 'editMessageCaption', 'editMessageMedia', 'editMessageReplyMarkup'))
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `burst`"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def ready_at(self, now: float) -> float:
+        """Time the next token is available"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return max(now, self.updated)
+        return self.updated + (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, until: float):
+        """Hold back tokens until a time (after a 429 Retry-After), then allow one"""
+        self.tokens = 1
+        self.updated = max(self.updated, until)
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+class _Request:
+    """One queued API call and everyone waiting for its result"""
+
+    __slots__ = ('lane', 'seq', 'callback', 'args', 'kwargs', 'futures', 'enqueued_at', 'edit_key', 'retries')
+
+    def __init__(self, lane: int, seq: int, callback, args, kwargs, future, now: float, edit_key=None):
+        self.lane = lane
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.futures = [future]
+        self.enqueued_at = now
+        self.edit_key = edit_key
+        self.retries = 0
+
+class _ChatQueue:
+    """Pending requests of one chat, one deque per lane"""
+
+    __slots__ = ('bucket', 'lanes', 'busy', 'key')
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.lanes = [deque() for _ in LANES]
+        self.busy = False  # a request is in flight; chats send one at a time, in order
+        self.key = None  # current scheduling heap entry
+
+    def head(self) -> Optional[_Request]:
+        for lane in self.lanes:
+            if lane:
+                return lane[0]
+        return None
+
+class SendQueue(BaseRateLimiter):
+    """Outbound scheduler keeping the bot under Telegram's flood limits
+
+    Messages and edits (send*/edit*/copy*/forward* endpoints with a
+    chat_id) are queued; other requests pass straight through. A request
+    goes out when both the global bucket (30/s) and its chat's bucket
+    (about 20/min in groups) have a token. Among chats that may send,
+    replies go before normal messages and normal messages before
+    broadcasts. A pending edit of a message is replaced by a newer edit
+    of the same message, and both callers get the result. A 429 pauses
+    the chat for the Retry-After time and requeues the request.
+
+    The lane of a request can be chosen with rate_limit_args, e.g.
+    ``bot.send_message(..., rate_limit_args='broadcast')``.
+    """
+
+    def __init__(self, config: Dict = None):
+        config = config or {}
+        self.global_rate = config.get('global_rate', 30)
+        self.global_burst = config.get('global_burst', 1)
+        # Bursts come out of the per-minute budget so no 60s window exceeds it
+        self.group_burst = config.get('group_burst', 3)
+        self.group_rate = (config.get('group_per_minute', 20) - self.group_burst) / 60
+        self.private_rate = config.get('private_rate', 1)
+        self.private_burst = config.get('private_burst', 3)
+        self.max_retries = config.get('max_retries', 3)
+        self.max_inflight = config.get('max_inflight', 32)
+
+        self.global_bucket = None
+        self.chats: Dict[Any, _ChatQueue] = {}
+        self.edits: Dict[tuple, _Request] = {}
+        self.ready = []  # (lane, seq, chat_id) of chats allowed to send now
+        self.waiting = []  # (ready_at, seq, chat_id) of chats waiting for a token
+        self.seq = itertools.count()
+        self._wakeup = None
+        self._inflight = None
+        self._dispatcher = None
+        self._last_sweep = 0.0
+
+        self.stats = defaultdict(int)
+        self.waits = [deque(maxlen=1024) for _ in LANES]
+
+    # ==================== LIFECYCLE ====================
+
+    async def initialize(self) -> None:
+        self.global_bucket = TokenBucket(self.global_rate, self.global_burst, time.monotonic())
+        self._wakeup = asyncio.Event()
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        self._dispatcher = asyncio.create_task(self._run())
+
+    async def shutdown(self) -> None:
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+
+        for chat in self.chats.values():
+            for lane in chat.lanes:
+                for request in lane:
+                    for future in request.futures:
+                        if not future.done():
+                            future.cancel()
+        self.chats.clear()
+        self.edits.clear()
+
+    # ==================== ENQUEUE ====================
+
+    def _lane(self, endpoint: str, data: Dict, rate_limit_args) -> int:
+        """Lane index for a request"""
+        if isinstance(rate_limit_args, str) and rate_limit_args in LANES:
+            return LANES.index(rate_limit_args)
+        if endpoint in EDIT_ENDPOINTS or data.get('reply_to_message_id'):
+            return 0
+        return 1
+
+    def _chat(self, chat_id, now: float) -> _ChatQueue:
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            is_group = not isinstance(chat_id, int) or chat_id < 0
+            bucket = (TokenBucket(self.group_rate, self.group_burst, now) if is_group
+                      else TokenBucket(self.private_rate, self.private_burst, now))
+            chat = self.chats[chat_id] = _ChatQueue(bucket)
+        return chat
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, Dict, List[Dict]]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[Any],
+    ) -> Union[bool, Dict, List[Dict]]:
+        chat_id = data.get('chat_id')
+        if chat_id is None or endpoint == 'sendChatAction' or not endpoint.startswith(QUEUED_PREFIXES):
+            self.stats['passthrough'] += 1
+            return await callback(*args, **kwargs)
+
+        now = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+
+        edit_key = (chat_id, data.get('message_id'), endpoint) if endpoint in EDIT_ENDPOINTS else None
+        pending = self.edits.get(edit_key) if edit_key else None
+        if pending is not None:
+            # Not sent yet: send only the newest content
+            pending.args, pending.kwargs = args, kwargs
+            pending.futures.append(future)
+            self.stats['coalesced'] += 1
+            return await future
+
+        chat = self._chat(chat_id, now)
+        request = _Request(self._lane(endpoint, data, rate_limit_args), next(self.seq),
+                           callback, args, kwargs, future, now, edit_key)
+        chat.lanes[request.lane].append(request)
+        if edit_key:
+            self.edits[edit_key] = request
+        self.stats['queued'] += 1
+
+        self._schedule(chat_id, chat, now)
+        self._wakeup.set()
+        return await future
+
+    # ==================== DISPATCH ====================
+
+    def _schedule(self, chat_id, chat: _ChatQueue, now: float):
+        """(Re)insert a chat in the ready or waiting heap for its head request"""
+        head = chat.head()
+        if head is None or chat.busy:
+            chat.key = None
+            return
+
+        ready_at = chat.bucket.ready_at(now)
+        if ready_at <= now:
+            key = (head.lane, head.seq, chat_id)
+            if chat.key != key:
+                heapq.heappush(self.ready, key)
+        else:
+            key = (ready_at, head.seq, chat_id)
+            if chat.key != key:
+                heapq.heappush(self.waiting, key)
+        chat.key = key
+
+    def _promote(self, now: float):
+        """Move chats whose bucket has refilled to the ready heap"""
+        while self.waiting and self.waiting[0][0] <= now:
+            key = heapq.heappop(self.waiting)
+            chat = self.chats.get(key[2])
+            if chat is not None and chat.key == key:
+                self._schedule(key[2], chat, now)
+
+    def _pop_ready(self):
+        """Highest-priority chat allowed to send, skipping stale heap entries"""
+        while self.ready:
+            key = heapq.heappop(self.ready)
+            chat = self.chats.get(key[2])
+            if chat is not None and chat.key == key:
+                chat.key = None
+                return key[2], chat
+        return None, None
+
+    async def _run(self):
+        """Hand queued requests to the API as tokens allow; runs until cancelled"""
+        while True:
+            now = time.monotonic()
+            self._promote(now)
+
+            if not self.ready:
+                if now - self._last_sweep > 60:
+                    self._sweep(now)
+                timeout = self.waiting[0][0] - now if self.waiting else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            # Pace against the global limit, then pick the best chat at that moment
+            delay = self.global_bucket.ready_at(now) - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            chat_id, chat = self._pop_ready()
+            if chat is None:
+                continue
+
+            head = chat.head()
+            request = chat.lanes[head.lane].popleft()
+            if request.edit_key and self.edits.get(request.edit_key) is request:
+                del self.edits[request.edit_key]
+
+            if all(future.done() for future in request.futures):
+                # Every caller gave up (cancelled) while it was queued
+                self.stats['dropped'] += 1
+                self._schedule(chat_id, chat, now)
+                continue
+
+            self.global_bucket.take(now)
+            chat.bucket.take(now)
+            chat.busy = True
+            self.waits[request.lane].append(now - request.enqueued_at)
+
+            await self._inflight.acquire()
+            asyncio.create_task(self._send(chat_id, chat, request))
+
+    async def _send(self, chat_id, chat: _ChatQueue, request: _Request):
+        """Make one API call and settle its waiters"""
+        try:
+            result = await request.callback(*request.args, **request.kwargs)
+        except RetryAfter as e:
+            self._retry(chat_id, chat, request, e)
+        except Exception as e:
+            self.stats['failed'] += 1
+            self._settle(request, error=e)
+        else:
+            self.stats['sent'] += 1
+            self._settle(request, result=result)
+        finally:
+            self._inflight.release()
+            chat.busy = False
+            self._schedule(chat_id, chat, time.monotonic())
+            self._wakeup.set()
+
+    def _retry(self, chat_id, chat: _ChatQueue, request: _Request, error: RetryAfter):
+        """Pause the chat for Retry-After and requeue the request at its lane's front"""
+        self.stats['retry_after'] += 1
+        retry_after = error.retry_after
+        if isinstance(retry_after, timedelta):
+            retry_after = retry_after.total_seconds()
+        chat.bucket.pause(time.monotonic() + retry_after)
+
+        if request.retries >= self.max_retries:
+            self.stats['failed'] += 1
+            self._settle(request, error=error)
+            return
+
+        if request.edit_key:
+            newer = self.edits.get(request.edit_key)
+            if newer is not None:
+                # A newer edit of the same message is already queued
+                newer.futures.extend(request.futures)
+                return
+            self.edits[request.edit_key] = request
+
+        request.retries += 1
+        chat.lanes[request.lane].appendleft(request)
+
+    def _settle(self, request: _Request, result=None, error: Exception = None):
+        for future in request.futures:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _sweep(self, now: float):
+        """Forget idle chats whose bucket has fully refilled"""
+        self._last_sweep = now
+        idle = [chat_id for chat_id, chat in self.chats.items()
+                if not chat.busy and chat.head() is None and chat.bucket.is_full(now)]
+        for chat_id in idle:
+            del self.chats[chat_id]
+
+    # ==================== METRICS ====================
+
+    def get_stats(self) -> Dict:
+        """Get queue depth, outcomes and queue wait per lane"""
+        lanes = {}
+        for index, name in enumerate(LANES):
+            samples = sorted(self.waits[index])
+            lanes[name] = {
+                'queued': sum(len(chat.lanes[index]) for chat in self.chats.values()),
+                'avg_wait_ms': round(sum(samples) / len(samples) * 1000, 1) if samples else 0.0,
+                'p95_wait_ms': round(samples[int(len(samples) * 0.95)] * 1000, 1) if samples else 0.0,
+            }
+        return {**self.stats, 'chats': len(self.chats), 'lanes': lanes}
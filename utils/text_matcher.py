@@ -0,0 +1,105 @@
+"""
+Multi-Pattern Text Matching
+Aho-Corasick automaton shared by the AI tokenizer and moderation filters
+"""
+
+import unicodedata
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Sequence, Tuple
+
+def is_word_char(char: str) -> bool:
+    """Check if a character can be part of a word (letters, digits, Bengali marks)"""
+    return char.isalnum() or char == '_' or unicodedata.category(char)[0] == 'M'
+
+def at_word_boundaries(text: str, start: int, end: int) -> bool:
+    """Check that text[start:end] is not part of a longer word"""
+    if start > 0 and is_word_char(text[start - 1]) and is_word_char(text[start]):
+        return False
+    if end < len(text) and is_word_char(text[end]) and is_word_char(text[end - 1]):
+        return False
+    return True
+
+class AhoCorasick:
+    """Aho-Corasick automaton over any sequence of hashable symbols
+
+    Patterns are strings (matched character by character) or tuples of
+    tokens (matched word by word). After build(), all patterns are found
+    in a single linear pass over the input, regardless of how many there are.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[Sequence[Hashable], Any]] = ()):
+        self.goto: List[Dict[Hashable, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[List[Tuple[int, Any]]] = [[]]
+        self.size = 0
+        self.built = False
+
+        for pattern, value in patterns:
+            self.add(pattern, value)
+        self.build()
+
+    def add(self, pattern: Sequence[Hashable], value: Any = None):
+        """Add a pattern; call build() before matching again"""
+        if not pattern:
+            return
+
+        state = 0
+        for symbol in pattern:
+            next_state = self.goto[state].get(symbol)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][symbol] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = next_state
+
+        self.outputs[state].append((len(pattern), value))
+        self.size += 1
+        self.built = False
+
+    def build(self):
+        """Compute failure links breadth-first"""
+        queue = deque()
+        for state in self.goto[0].values():
+            self.fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for symbol, next_state in self.goto[state].items():
+                queue.append(next_state)
+
+                fallback = self.fail[state]
+                while fallback and symbol not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(symbol, 0)
+
+                # Inherit matches that end at the fallback state
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+        self.built = True
+
+    def step(self, state: int, symbol: Hashable) -> int:
+        """Advance the automaton by one symbol"""
+        goto = self.goto
+        while state and symbol not in goto[state]:
+            state = self.fail[state]
+        return goto[state].get(symbol, 0)
+
+    def iter_matches(self, sequence: Sequence[Hashable]) -> Iterator[Tuple[int, int, Any]]:
+        """Yield (start, end, value) for every pattern occurrence"""
+        state = 0
+        for index, symbol in enumerate(sequence):
+            state = self.step(state, symbol)
+            for length, value in self.outputs[state]:
+                yield index + 1 - length, index + 1, value
+
+    def iter_word_matches(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """Yield matches in a string that are not part of a longer word"""
+        for start, end, value in self.iter_matches(text):
+            if at_word_boundaries(text, start, end):
+                yield start, end, value
+
+    def __len__(self) -> int:
+        return self.size